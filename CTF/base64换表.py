@@ -1,20 +1,449 @@
+import sys
+import math
+import time
+import binascii
+import heapq
 import base64
+import string
+import argparse
+from functools import lru_cache
+from collections import deque
+
+STANDARD_TABLE = 'ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789+/'
+
+# 流式解码每次读取的字节数（读到的数据按 4 字符对齐后再解码）
+STREAM_CHUNK_SIZE = 1 << 20
+WHITESPACE = b' \t\r\n\v\f'
+
+# 求解换表时对明文字节的约束：默认只允许可打印字符
+CHARSETS = {
+    'printable': set(string.printable.encode()),
+    'flag': set((string.ascii_letters + string.digits + '_{}-!@#$?.').encode()),
+}
+# beam search 每一步保留的部分解数量
+BEAM_WIDTH = 64
+
+# 给候选明文打分用的字符频率 (%)：英文字母按词频，flag 中常见的数字、下划线和括号略高于其他标点
+ENGLISH_FREQ = {
+    'e': 10.2, 't': 7.3, 'a': 6.5, 'o': 6.0, 'i': 5.6, 'n': 5.4, 's': 5.1, 'h': 4.9, 'r': 4.8,
+    'd': 3.4, 'l': 3.2, 'c': 2.2, 'u': 2.2, 'm': 1.9, 'w': 1.9, 'f': 1.8, 'g': 1.6, 'y': 1.6,
+    'p': 1.5, 'b': 1.0, 'v': 0.8, 'k': 0.6, 'j': 0.12, 'x': 0.12, 'q': 0.08, 'z': 0.06, ' ': 15.0,
+}
+DIGIT_FREQ = 0.5
+SYMBOL_FREQ = {'_': 0.5, '{': 0.2, '}': 0.2, '\n': 1.0, ',': 0.8, '.': 0.8}
+OTHER_FREQ = 0.02
+
+
+@lru_cache(maxsize=32)
+def translation_table(alphabet, swapcase=False):
+    """换表 -> 标准表的 bytes.translate 转换表，按 (换表, 是否先大小写互换) 缓存
+
+    swapcase 为 True 时先把密文大小写互换再查换表（部分题目的额外一步）。
+    """
+    if len(alphabet) != 64 or len(set(alphabet)) != 64:
+        raise ValueError(f"换表必须是 64 个互不相同的字符，当前为 {len(alphabet)} 个")
+    src = alphabet.swapcase() if swapcase else alphabet
+    return bytes.maketrans(src.encode('latin-1'), STANDARD_TABLE.encode())
+
+
+def decode_custom(data, alphabet, swapcase=False):
+    """用换表 alphabet 解码 data (str 或 bytes)，忽略空白字符"""
+    if isinstance(data, str):
+        data = data.encode('latin-1')
+    return base64.b64decode(data.translate(translation_table(alphabet, swapcase), WHITESPACE))
+
+
+def decode_stream(src, dst, alphabet, swapcase=False, chunk_size=STREAM_CHUNK_SIZE):
+    """从二进制流 src 分块读取密文，按 4 字符对齐解码后写入 dst，返回写入的字节数
+
+    内存占用只与 chunk_size 有关；末尾 '=' 填充随最后一块一起解码。
+    """
+    table = translation_table(alphabet, swapcase)
+    pending = b''
+    total = 0
+    while True:
+        chunk = src.read(chunk_size)
+        if not chunk:
+            break
+        data = pending + chunk.translate(table, WHITESPACE)
+        cut = len(data) - len(data) % 4
+        if cut:
+            out = base64.b64decode(data[:cut], validate=True)
+            dst.write(out)
+            total += len(out)
+        pending = data[cut:]
+    if pending.rstrip(b'='):
+        # 省略了 '=' 填充的密文，补齐后解码剩余部分
+        out = base64.b64decode(pending + b'=' * (-len(pending) % 4))
+        dst.write(out)
+        total += len(out)
+    return total
+
+
+def _byte_log_freq():
+    table = []
+    for b in range(256):
+        c = chr(b)
+        if c.lower() in ENGLISH_FREQ and c.isascii():
+            # 大写字母比小写少见
+            freq = ENGLISH_FREQ[c.lower()] * (1 if c.islower() or c == ' ' else 0.1)
+        elif c.isdigit() and c.isascii():
+            freq = DIGIT_FREQ
+        else:
+            freq = SYMBOL_FREQ.get(c, OTHER_FREQ)
+        table.append(math.log(freq / 100))
+    return table
+
+
+def _pair_log_freq():
+    """LOG_PAIR[t][va * 64 + vb]：位置 t 上两个字符取值 va、vb 拼出的字节的对数频率"""
+    log_freq = _byte_log_freq()
+    tables = []
+    for t in range(3):
+        table = []
+        for va in range(64):
+            for vb in range(64):
+                table.append(log_freq[_pair_byte(t, va, vb)])
+        tables.append(table)
+    return tables
+
+
+def _bits(mask):
+    while mask:
+        low = mask & -mask
+        yield low.bit_length() - 1
+        mask ^= low
+
+
+def _pair_byte(t, va, vb):
+    if t == 0:
+        return ((va << 2) | (vb >> 4)) & 0xff
+    if t == 1:
+        return ((va & 15) << 4 | (vb >> 2)) & 0xff
+    return ((va & 3) << 6 | vb) & 0xff
+
+
+def _pair_tables(allowed):
+    """字节在 4 字符组中有 3 种位置，分别由相邻两个字符拼成：
+    t=0: v0<<2 | v1>>4，t=1: (v1&15)<<4 | v2>>2，t=2: (v2&3)<<6 | v3。
+    返回每种位置下 fwd[va] = 允许的 vb 位图、rev[vb] = 允许的 va 位图。"""
+    tables = []
+    for t in range(3):
+        fwd, rev = [0] * 64, [0] * 64
+        for va in range(64):
+            for vb in range(64):
+                if _pair_byte(t, va, vb) in allowed:
+                    fwd[va] |= 1 << vb
+                    rev[vb] |= 1 << va
+        tables.append((fwd, rev))
+    return tables
+
+
+class TableSolver:
+    """已知部分明文时恢复自定义 Base64 表
+
+    把密文中出现的每个字符看作一个取值 0~63 的变量（用 64 位位图表示候选值），
+    每个明文字节给出相邻两个变量之间的二元约束（已知明文为固定字节，其余为字符集约束），
+    再加上"不同字符取值不同"的约束。先做弧相容传播缩小候选范围，再按字符逐个赋值做 beam search，
+    用已确定明文字节的字符频率给部分解打分，只保留得分最高的若干个部分解。
+    """
+
+    def __init__(self, ciphertexts, known=(), charset=CHARSETS['printable']):
+        self.ciphertexts = [c.rstrip('=') for c in ciphertexts]
+        self.symbols = sorted(set(''.join(self.ciphertexts)))
+        index = {c: i for i, c in enumerate(self.symbols)}
+        self.domains = [(1 << 64) - 1] * len(self.symbols)
+        self._table_cache = {}
+        constraints = {}
+        for n, text in enumerate(self.ciphertexts):
+            plain = known[n] if n < len(known) else b''
+            vars_ = [index[c] for c in text]
+            for k in range(len(vars_) * 6 // 8):
+                group, t = divmod(k, 3)
+                a, b = vars_[4 * group + t], vars_[4 * group + t + 1]
+                allowed = frozenset((plain[k],)) if k < len(plain) else frozenset(charset)
+                key = (a, b, t, allowed)
+                constraints[key] = constraints.get(key, 0) + 1
+            # 已知明文在字符中间结束时，只约束已知的高位
+            bit_len = len(plain) * 8
+            if bit_len % 6 and bit_len // 6 < len(vars_):
+                known_bits = bit_len % 6
+                pos = bit_len // 6
+                prefix = int.from_bytes(plain, 'big') & ((1 << known_bits) - 1)
+                self.domains[vars_[pos]] &= sum(1 << v for v in range(64) if v >> (6 - known_bits) == prefix)
+            # 规范编码中最后一个字符多余的低位为 0
+            if len(vars_) % 4 in (2, 3):
+                pad_bits = 4 if len(vars_) % 4 == 2 else 2
+                self.domains[vars_[-1]] &= sum(1 << v for v in range(64) if v % (1 << pad_bits) == 0)
+        self.constraints = []
+        self.by_var = [[] for _ in self.symbols]
+        # 每个约束记录出现次数和字节位置 t，搜索时用于给部分解打分
+        for (a, b, t, allowed), count in constraints.items():
+            fwd, rev = self._tables(allowed)[t]
+            ci = len(self.constraints)
+            self.constraints.append((a, b, fwd, rev, t, count))
+            self.by_var[a].append(ci)
+            self.by_var[b].append(ci)
+
+    def _tables(self, allowed):
+        if allowed not in self._table_cache:
+            self._table_cache[allowed] = _pair_tables(allowed)
+        return self._table_cache[allowed]
+
+    def propagate(self, domains, changed=None):
+        """弧相容 + 全不同约束，原地收缩 domains，出现空域时返回 False
+
+        changed 为取值发生变化的字符，为 None 时从全部约束开始传播。"""
+        if changed is None:
+            changed = list(range(len(domains)))
+        queue = deque()
+        pending = set()
+        fixed = set()
+        while changed or queue:
+            if changed:
+                var = changed.pop()
+                if not domains[var]:
+                    return False
+                for ci in self.by_var[var]:
+                    if ci not in pending:
+                        pending.add(ci)
+                        queue.append(ci)
+                # 某个字符的取值确定后，其余字符都不能再取这个值
+                if domains[var] & (domains[var] - 1) == 0 and var not in fixed:
+                    fixed.add(var)
+                    for other in range(len(domains)):
+                        if other != var and domains[other] & domains[var]:
+                            domains[other] &= ~domains[var]
+                            changed.append(other)
+                continue
+            ci = queue.popleft()
+            pending.discard(ci)
+            a, b, fwd, rev = self.constraints[ci][:4]
+            if a == b:
+                new = sum(1 << v for v in _bits(domains[a]) if fwd[v] >> v & 1)
+                if new != domains[a]:
+                    domains[a] = new
+                    changed.append(a)
+                continue
+            da, db = domains[a], domains[b]
+            new_a = sum(1 << v for v in _bits(da) if fwd[v] & db)
+            new_b = sum(1 << v for v in _bits(db) if rev[v] & new_a)
+            if new_a != da:
+                domains[a] = new_a
+                changed.append(a)
+            if new_b != db:
+                domains[b] = new_b
+                changed.append(b)
+        return True
+
+    def _search_order(self, domains):
+        """已确定的字符排在最前，其余每次挑与已排好的字符共同出现次数最多的，让打分尽早生效"""
+        weight = [[0] * len(domains) for _ in domains]
+        for a, b, _, _, _, count in self.constraints:
+            weight[a][b] += count
+            weight[b][a] += count
+        order = [i for i, d in enumerate(domains) if d & (d - 1) == 0]
+        rest = set(range(len(domains))) - set(order)
+        while rest:
+            var = max(rest, key=lambda i: (sum(weight[i][j] for j in order), sum(weight[i])))
+            order.append(var)
+            rest.discard(var)
+        return order
+
+    def solve(self, beam_width=BEAM_WIDTH):
+        """返回 (传播后的候选域, [完整解])，完整解按得分降序，每个为各字符对应的取值列表"""
+        domains = list(self.domains)
+        if not self.propagate(domains):
+            return domains, []
+        self.log_pair = log_pair = _pair_log_freq()
+        neighbours = [[] for _ in domains]
+        for a, b, fwd, _, t, count in self.constraints:
+            neighbours[a].append((b, True, fwd, log_pair[t], count))
+            if b != a:
+                neighbours[b].append((a, False, fwd, log_pair[t], count))
+
+        # 状态: (得分, 各字符取值 (-1 为未赋值), 已使用取值的位图)
+        beam = [(0.0, [-1] * len(domains), 0)]
+        for var in self._search_order(domains):
+            candidates = []
+            for score, values, used in beam:
+                for v in _bits(domains[var] & ~used):
+                    delta = 0.0
+                    for other, is_first, fwd, log_table, count in neighbours[var]:
+                        w = v if other == var else values[other]
+                        if w < 0:
+                            continue
+                        va, vb = (v, w) if is_first else (w, v)
+                        if not fwd[va] >> vb & 1:
+                            break
+                        delta += count * log_table[va * 64 + vb]
+                    else:
+                        candidates.append((score + delta, values, used, v))
+            if not candidates:
+                return domains, []
+            beam = []
+            for score, values, used, v in heapq.nlargest(beam_width, candidates, key=lambda c: c[0]):
+                values = list(values)
+                values[var] = v
+                beam.append((score, values, used | 1 << v))
+        solutions = [self.refine(domains, values) for _, values, _ in beam]
+        solutions.sort(key=lambda item: -item[0])
+        return domains, [values for _, values in solutions]
+
+    def _local_score(self, cis, values):
+        total = 0.0
+        for ci in cis:
+            a, b, fwd, _, t, count = self.constraints[ci]
+            va, vb = values[a], values[b]
+            if not fwd[va] >> vb & 1:
+                return None
+            total += count * self.log_pair[t][va * 64 + vb]
+        return total
+
+    def refine(self, domains, values):
+        """beam search 的局部修补：反复尝试交换两个字符的取值或改用未使用的取值，得分变高就接受"""
+        values = list(values)
+        n = len(values)
+        improved = True
+        while improved:
+            improved = False
+            for x in range(n):
+                unused = (1 << 64) - 1
+                for v in values:
+                    unused &= ~(1 << v)
+                # y 为字符下标时交换两者取值，为 None 时把 x 改成某个未使用的取值
+                moves = [(y, values[y]) for y in range(x + 1, n)] + [(None, v) for v in _bits(unused)]
+                for y, new in moves:
+                    old = values[x]
+                    if not domains[x] >> new & 1 or (y is not None and not domains[y] >> old & 1):
+                        continue
+                    cis = set(self.by_var[x])
+                    if y is not None:
+                        cis.update(self.by_var[y])
+                    before = self._local_score(cis, values)
+                    values[x] = new
+                    if y is not None:
+                        values[y] = old
+                    after = self._local_score(cis, values)
+                    if after is not None and after > before + 1e-9:
+                        improved = True
+                        if y is None:
+                            break
+                        continue
+                    values[x] = old
+                    if y is not None:
+                        values[y] = new
+        return self._local_score(range(len(self.constraints)), values), values
+
+    def table(self, values):
+        """由字符取值得到换表字符串，无法确定的位置用 '?' 表示"""
+        table = ['?'] * 64
+        for symbol, v in zip(self.symbols, values):
+            if v is not None:
+                table[v] = symbol
+        # 换表通常是标准表的重排，只剩一个字符和一个位置未知时直接补上
+        missing = set(STANDARD_TABLE) - set(table)
+        if table.count('?') == 1 and len(missing) == 1:
+            table[table.index('?')] = missing.pop()
+        return ''.join(table)
+
+
+def decode_partial(ciphertext, table):
+    """用（可能不完整的）换表解码，含未知字符的字节显示为 '?'"""
+    index = {c: i for i, c in enumerate(table) if c != '?'}
+    text = ciphertext.rstrip('=')
+    out = bytearray()
+    for k in range(len(text) * 6 // 8):
+        group, t = divmod(k, 3)
+        a, b = text[4 * group + t], text[4 * group + t + 1]
+        if a not in index or b not in index:
+            out += b'?'
+            continue
+        out.append(_pair_byte(t, index[a], index[b]))
+    return bytes(out)
+
+
+def recover_table(ciphertexts, known=(), charset=CHARSETS['printable'], beam_width=BEAM_WIDTH):
+    """返回按得分排序的 [(换表, [明文])]；没有完整解时返回由已确定字符组成的部分换表"""
+    solver = TableSolver(ciphertexts, known, charset)
+    domains, solutions = solver.solve(beam_width)
+    if not solutions:
+        partial = [d.bit_length() - 1 if d and d & (d - 1) == 0 else None for d in domains]
+        solutions = [partial]
+    results = []
+    for values in solutions:
+        table = solver.table(values)
+        results.append((table, [decode_partial(c, table) for c in solver.ciphertexts]))
+    return results
+
+
+def solve_main(args):
+    # 与 -t/-f 使用同一个 --swapcase 约定，求出的换表可以原样交给 -t
+    ciphertexts = [c.swapcase() for c in args.ciphertext] if args.swapcase else list(args.ciphertext)
+    known = [k.encode() for k in args.known]
+    if len(known) == 1:
+        known = known * len(ciphertexts)
+    charset = CHARSETS.get(args.charset, set(args.charset.encode()))
+    start = time.perf_counter()
+    results = recover_table(ciphertexts, known, charset, args.beam)
+    print(f"求解耗时 {time.perf_counter() - start:.2f} 秒，候选 {len(results)} 个")
+    for table, plains in results[:args.top]:
+        print(f"\n换表: {table}")
+        print(f"流式解码：-t '{table}'{' --swapcase' if args.swapcase else ''}")
+        for plain in plains:
+            print("明文：", plain.decode('utf-8', errors='replace'))
+
+
+def stream_main(args):
+    src = dst = None
+    try:
+        src = sys.stdin.buffer if args.file == '-' else open(args.file, 'rb')
+        dst = open(args.output, 'wb') if args.output else sys.stdout.buffer
+        start = time.perf_counter()
+        total = decode_stream(src, dst, args.table, args.swapcase)
+        dst.flush()
+        print(f"解码 {total} 字节，耗时 {time.perf_counter() - start:.2f} 秒", file=sys.stderr)
+    except OSError as e:
+        print(f"无法读写文件: {e}", file=sys.stderr)
+    except (ValueError, binascii.Error) as e:
+        print(f"解码失败: {e}", file=sys.stderr)
+    finally:
+        if src is not None and src is not sys.stdin.buffer:
+            src.close()
+        if dst is not None and dst is not sys.stdout.buffer:
+            dst.close()
+
 
 def main():
+    parser = argparse.ArgumentParser(description="自定义表 Base64 解码；指定 -c 时根据已知明文恢复换表")
+    parser.add_argument('-c', '--ciphertext', action='append', default=[],
+                        help="密文，可多次指定（需使用同一张换表）")
+    parser.add_argument('-k', '--known', action='append', default=[],
+                        help="已知明文前缀，如 flag{；只给一个时对所有密文生效")
+    parser.add_argument('--charset', default='printable',
+                        help="明文字符集：printable (默认)、flag，或直接给出允许的字符")
+    parser.add_argument('--beam', type=int, default=BEAM_WIDTH, help="beam search 每步保留的部分解数量，默认 64")
+    parser.add_argument('--top', type=int, default=3, help="显示得分最高的前几个候选")
+    parser.add_argument('-t', '--table', help="换表；与 -f 一起使用时对文件做流式解码")
+    parser.add_argument('-f', '--file', help="密文文件，'-' 表示标准输入")
+    parser.add_argument('-o', '--output', help="解码结果写入的文件，默认写到标准输出")
+    parser.add_argument('--swapcase', action='store_true', help="解码前先把密文大小写互换（-c 求解与 -t/-f 解码都适用）")
+    args = parser.parse_args()
+    if args.ciphertext:
+        solve_main(args)
+        return
+    if args.file:
+        if not args.table:
+            parser.error("流式解码需要用 -t 指定换表")
+        stream_main(args)
+        return
+
     string = input("输入原始文本：")
     s2 = input("输入替换后的表：")
-    
-    s1 = 'ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789+/'
-    
-    string = string.swapcase()
-    
-    s3 = str.maketrans(s2, s1)
-    
-    t = string.translate(s3)
-    
-    flag = base64.b64decode(t)
-    
+
+    flag = decode_custom(string, s2, swapcase=True)
+
     print("解码后的结果：", flag.decode('utf-8'))
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
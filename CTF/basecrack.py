@@ -1,12 +1,19 @@
+import os
+import sys
+import time
+import re
+import json
+import math
 import base64
 import argparse
 import binascii
+import operator
+import unicodedata
 import string
+import collections
+import multiprocessing
 
 # 导入第三方库，失败时设为None
-try: import base58
-except ImportError: base58 = None
-
 try: import pybase62
 except ImportError: pybase62 = None
 
@@ -16,11 +23,14 @@ except ImportError: base91 = None
 try: import base85, base64 as b85_codec
 except ImportError: b85_codec = None
 
-try: import base36
-except ImportError: base36 = None
+try: import gmpy2
+except ImportError: gmpy2 = None
 
 try: import base45
 except ImportError: base45 = None
+
+try: import numpy as np
+except ImportError: np = None
 # 不可打印字符比例阈值
 rate = 0.1
 
@@ -68,6 +78,84 @@ def base92_decode(encoded_str):
     return bytes(decoded_bytes)
 
 
+# --- 进制转换引擎 ---
+# Base36/58/62 都是把整个字符串当作一个大整数，逐字符 num = num * base + idx 在 Python 大整数上是 O(n^2)。
+# 这里改为分治：先把每 RADIX_LEAF 位转为小整数，再两两合并 (左 * base^k + 右)，乘法规模逐层翻倍，
+# 借助 Karatsuba 乘法整体是次平方复杂度；安装了 gmpy2 时直接交给 GMP 的分治 + FFT 实现。
+BASE36_ALPHABET = string.digits + string.ascii_lowercase
+BASE58_CHARS = "123456789ABCDEFGHJKLMNPQRSTUVWXYZabcdefghijkmnopqrstuvwxyz"
+BASE62_CHARS = string.digits + string.ascii_uppercase + string.ascii_lowercase
+# GMP 的数字字符表，base <= 36 时不区分大小写
+GMP_DIGITS = string.digits + string.ascii_uppercase + string.ascii_lowercase
+RADIX_LEAF = 32
+
+_radix_tables = {}
+
+
+def _radix_table(alphabet):
+    """按字母表缓存 (合法字符集合, 字符->数值的翻译表, 字符->GMP 数字的翻译表)"""
+    table = _radix_tables.get(alphabet)
+    if table is None:
+        base = len(alphabet)
+        gmp_digits = GMP_DIGITS[:base] if base > 36 else (string.digits + string.ascii_lowercase)[:base]
+        table = (frozenset(alphabet),
+                 str.maketrans(alphabet, ''.join(map(chr, range(base)))),
+                 str.maketrans(alphabet, gmp_digits))
+        _radix_tables[alphabet] = table
+    return table
+
+
+def _digits_to_int(digits, base):
+    """digits 为每位数值组成的 bytes，自底向上两两合并"""
+    n = len(digits)
+    if n == 0:
+        return 0
+    powers = [base ** i for i in range(RADIX_LEAF - 1, -1, -1)]
+    # 从右往左切块，只有最左边的块可能不满 RADIX_LEAF 位
+    head = n % RADIX_LEAF or RADIX_LEAF
+    values = [sum(map(operator.mul, digits[:head], powers[RADIX_LEAF - head:]))]
+    values += [sum(map(operator.mul, digits[i:i + RADIX_LEAF], powers))
+               for i in range(head, n, RADIX_LEAF)]
+    scale = base ** RADIX_LEAF
+    while len(values) > 1:
+        odd = len(values) % 2
+        merged = values[:odd]
+        merged += [values[i] * scale + values[i + 1] for i in range(odd, len(values), 2)]
+        values = merged
+        scale *= scale
+    return values[0]
+
+
+def radix_decode_int(s, alphabet):
+    """把按 alphabet 表示的位置进制字符串转为整数，遇到非法字符抛出 ValueError"""
+    if not s:
+        return 0
+    valid, to_values, to_gmp = _radix_table(alphabet)
+    if not valid.issuperset(s):
+        raise ValueError("输入包含字母表之外的字符")
+    if gmpy2 is not None and len(alphabet) <= 62:
+        return int(gmpy2.mpz(s.translate(to_gmp), len(alphabet)))
+    return _digits_to_int(s.translate(to_values).encode('latin-1'), len(alphabet))
+
+
+def int_to_bytes(num, min_len=0):
+    return num.to_bytes(max((num.bit_length() + 7) // 8, min_len), 'big')
+
+
+def bench_radix(max_size=10 * 1024 * 1024):
+    """打印 Base62 解码耗时随输入规模 (1 KB 起每次 x10) 的变化"""
+    engine = "gmpy2" if gmpy2 is not None else "纯 Python 分治"
+    print(f"进制转换基准测试 (引擎: {engine})")
+    size = 1024
+    while size <= max_size:
+        encoded = os.urandom(size).translate(bytes(ord(BASE62_CHARS[i % 62]) for i in range(256))).decode()
+        start = time.perf_counter()
+        decode_base62(encoded)
+        elapsed = time.perf_counter() - start
+        print(f"  {size:>10} 字节: {elapsed:.4f} 秒 ({size / elapsed / 1024 / 1024:.2f} MB/s)")
+        size *= 10
+
+
 # --- 解码函数 ---
 def decode_base16(s):
     try:
@@ -99,20 +187,26 @@ def decode_base32(s):
         return None
 
 def decode_base36(s):
-    if base36:
-        try:
-            # base36.loads 返回整数，需要转为 bytes
-            decoded_int = base36.loads(s)
-            # 计算需要的字节数
-            byte_len = (decoded_int.bit_length() + 7) // 8
-            # 处理整数为0的特殊情况
-            if byte_len == 0 and decoded_int == 0 and len(s) > 0:
-                 byte_len = 1
-            return decoded_int.to_bytes(byte_len, 'big')
-        except Exception as e:
-            # print(f"Base36 解码失败: {e}")
+    try:
+        # 与 int(s, 36) 一致：忽略首尾空白，不区分大小写，允许一个正负号、数字间的单个下划线和 Unicode 十进制数字
+        s = s.strip()
+        negative = s[:1] == '-'
+        if s[:1] in ('+', '-'):
+            s = s[1:]
+        if not s or s[0] == '_' or s[-1] == '_' or '__' in s:
             return None
-    return None
+        s = s.replace('_', '')
+        if not s.isascii():
+            s = ''.join(str(unicodedata.decimal(c)) if unicodedata.decimal(c, None) is not None else c for c in s)
+        decoded_int = radix_decode_int(s.lower(), BASE36_ALPHABET)
+        # 负数无法转成 bytes，只有 -0 例外
+        if negative and decoded_int:
+            return None
+        # 处理整数为0的特殊情况
+        return int_to_bytes(decoded_int, min_len=1)
+    except Exception as e:
+        # print(f"Base36 解码失败: {e}")
+        return None
 
 def decode_base45(s):
     if base45:
@@ -124,30 +218,22 @@ def decode_base45(s):
     return None
 
 def decode_base58(s):
-    if base58:
-        try:
-            return base58.b58decode(s)
-        except Exception as e:
-            # print(f"Base58 解码失败: {e}")
-            return None
-    return None
+    """Bitcoin 字母表的 Base58，开头的每个 '1' 对应一个 0x00 字节"""
+    try:
+        s = s.rstrip()
+        digits = s.lstrip(BASE58_CHARS[0])
+        zeros = len(s) - len(digits)
+        return b'\0' * zeros + int_to_bytes(radix_decode_int(digits, BASE58_CHARS))
+    except Exception as e:
+        # print(f"Base58 解码失败: {e}")
+        return None
 
 def decode_base62(s):
     """使用标准Base62字母表(0-9A-Za-z)进行解码，兼容CyberChef等工具"""
-    alphabet = "0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz"
-    base = 62
     try:
-        num = 0
-        for char in s:
-            idx = alphabet.find(char)
-            if idx == -1:
-                return None  # 非法字符
-            num = num * base + idx
+        num = radix_decode_int(s, BASE62_CHARS)
         # 计算需要的字节数
-        byte_len = (num.bit_length() + 7) // 8
-        if byte_len == 0 and len(s) > 0:
-            byte_len = 1
-        return num.to_bytes(byte_len, 'big')
+        return int_to_bytes(num, min_len=1 if s else 0)
     except Exception:
         return None
 
@@ -186,46 +272,499 @@ def decode_base92(s):
     try: return base92_decode(s)
     except Exception: return None
 
-# --- 辅助函数 ---
+# --- 辅助函数 / 评分 ---
+# 可打印字符表只构建一次，判断时用 bytes.translate 在 C 层删除可打印字符，剩下的就是不可打印字符
+PRINTABLE_BYTES = bytes(string.printable, 'ascii')
+
+# 英文文本中各字符的出现频率 (%)，字母不区分大小写，空格约占 15%
+ENGLISH_FREQ = {
+    'e': 10.2, 't': 7.3, 'a': 6.5, 'o': 6.0, 'i': 5.6, 'n': 5.4, 's': 5.1, 'h': 4.9, 'r': 4.8,
+    'd': 3.4, 'l': 3.2, 'c': 2.2, 'u': 2.2, 'm': 1.9, 'w': 1.9, 'f': 1.8, 'g': 1.6, 'y': 1.6,
+    'p': 1.5, 'b': 1.0, 'v': 0.8, 'k': 0.6, 'j': 0.12, 'x': 0.12, 'q': 0.08, 'z': 0.06, ' ': 15.0,
+}
+# 其余可打印字符、不可打印字符的兜底频率 (%)
+OTHER_PRINTABLE_FREQ = 0.2
+NON_PRINTABLE_FREQ = 0.0001
+
+
+def _build_log_freq_table():
+    table = []
+    for b in range(256):
+        c = chr(b).lower()
+        if c in ENGLISH_FREQ:
+            freq = ENGLISH_FREQ[c]
+        elif b in PRINTABLE_BYTES:
+            freq = OTHER_PRINTABLE_FREQ
+        else:
+            freq = NON_PRINTABLE_FREQ
+        table.append(math.log10(freq / 100))
+    return table
+
+
+# 256 项的对数频率表
+LOG_FREQ = _build_log_freq_table()
+# 普通英文文本每字节的平均对数频率约为 -1.3，随机字节约为 -4.5，用于把得分归一化到 0~1
+LOG_FREQ_BEST = -1.3
+LOG_FREQ_WORST = -4.5
+
+COMMON_BIGRAMS = (b'th', b'he', b'in', b'er', b'an', b're', b'on', b'at', b'en', b'nd',
+                  b'ti', b'es', b'or', b'te', b'of', b'ed', b'is', b'it', b'al', b'ar')
+# 英文文本中上述二元组约占全部相邻字符对的 20%
+COMMON_BIGRAM_SHARE = 0.2
+FLAG_PATTERN = re.compile(rb'(?i)(flag|ctf|key)\{[\x20-\x7e]*?\}')
+
+
+def printable_ratio(data):
+    """可打印 ASCII 字符所占比例"""
+    if not data:
+        return 0.0
+    return 1 - len(data.translate(None, PRINTABLE_BYTES)) / len(data)
+
+
 def is_printable(data):
     """检查 bytes 是否主要由可打印 ASCII 字符组成"""
     if not data:
         return False
-    # 允许一些非打印字符，但比例不能太高
-    printable_chars = set(bytes(string.printable, 'ascii'))
-    non_printable_count = sum(1 for byte in data if byte not in printable_chars)
-    # 阈值可以调整，例如允许最多 10% 的非打印字符
-    return non_printable_count <= len(data) * rate
+    # 允许一些非打印字符，但比例不能太高，例如允许最多 10% 的非打印字符
+    return printable_ratio(data) >= 1 - rate
+
+
+def byte_histogram(data):
+    """256 项的字节计数，有 NumPy 时用 bincount"""
+    if np is not None:
+        return np.bincount(np.frombuffer(data, dtype=np.uint8), minlength=256).tolist()
+    counts = [0] * 256
+    for b, n in collections.Counter(data).items():
+        counts[b] = n
+    return counts
+
+
+def english_score(data):
+    """按英文字符频率计算的平均对数概率，归一化到 0~1"""
+    if not data:
+        return 0.0
+    avg = sum(n * LOG_FREQ[b] for b, n in enumerate(byte_histogram(data)) if n) / len(data)
+    return min(1.0, max(0.0, (avg - LOG_FREQ_WORST) / (LOG_FREQ_BEST - LOG_FREQ_WORST)))
+
+
+def bigram_score(data):
+    """常见英文二元组所占比例，归一化到 0~1"""
+    if len(data) < 2:
+        return 0.0
+    lowered = data.lower()
+    hits = sum(lowered.count(bigram) for bigram in COMMON_BIGRAMS)
+    return min(1.0, hits / (len(data) - 1) / COMMON_BIGRAM_SHARE)
+
+
+def score_candidate(data, language=True):
+    """给候选解码结果打分：可打印比例为基础分，可选叠加英文字频/二元组得分，出现 flag{...} 时大幅加分"""
+    if not data:
+        return 0.0
+    score = printable_ratio(data)
+    if language:
+        score += 0.5 * english_score(data) + 0.5 * bigram_score(data)
+    if FLAG_PATTERN.search(data):
+        score += 2.0
+    return score
+
+DECODERS = [
+    ("Base16", decode_base16),
+    ("Base32", decode_base32),
+    ("Base36", decode_base36),
+    ("Base45", decode_base45),
+    ("Base58", decode_base58),
+    ("Base62", decode_base62),
+    ("Base64", decode_base64),
+    ("Base85", decode_base85),
+    ("Base91", decode_base91),
+    ("Base92", decode_base92),
+]
+
+# --- 字母表预筛选 ---
+# 各解码器可接受的字符（含填充符和空白）以及对去掉填充后长度的约束，
+# 输入中出现字母表之外的字符或长度不满足时直接跳过该解码器，避免无意义的大整数运算
+WHITESPACE = " \t\r\n"
+BASE32_CHARS = string.ascii_letters + "234567="
+BASE64_CHARS = string.ascii_letters + string.digits + "+/-_="
+A85_CHARS = "".join(chr(c) for c in range(ord('!'), ord('u') + 1)) + "zy<~>"
+B85_CHARS = string.digits + string.ascii_letters + "!#$%&()*+-;<=>?@^_`{|}~"
+BASE91_CHARS = string.ascii_letters + string.digits + '!#$%&()*+,./:;<=>?@[]^_`{|}~"'
+BASE92_CHARS = "".join(chr(c) for c in range(33, 127))
+
+
+def _charset_mask(chars):
+    mask = 0
+    for c in set(chars):
+        mask |= 1 << ord(c)
+    return mask
+
+
+# 非 ASCII 字符统一映射到第 128 位，任何解码器都不接受
+NON_ASCII_BIT = 1 << 128
+
+DECODER_RULES = {
+    "Base16": (_charset_mask(string.hexdigits + WHITESPACE), None),
+    "Base32": (_charset_mask(BASE32_CHARS), lambda n: n % 8 in (0, 2, 4, 5, 7)),
+    "Base36": (_charset_mask(string.digits + string.ascii_letters), None),
+    "Base45": (_charset_mask(string.digits + string.ascii_uppercase + " $%*+-./:"), lambda n: n % 3 != 1),
+    "Base58": (_charset_mask(BASE58_CHARS), None),
+    "Base62": (_charset_mask(BASE62_CHARS), None),
+    "Base64": (_charset_mask(BASE64_CHARS + WHITESPACE), lambda n: n % 4 != 1),
+    "Base85": (_charset_mask(A85_CHARS + B85_CHARS + WHITESPACE), None),
+    "Base91": (_charset_mask(BASE91_CHARS + WHITESPACE), None),
+    "Base92": (_charset_mask(BASE92_CHARS + WHITESPACE), None),
+}
+# Base45 的空格是字母表中的有效字符，长度约束按原始长度计算
+WHITESPACE_SIGNIFICANT = {"Base45"}
+
+
+def profile_input(s):
+    """一次遍历得到输入的字符集位图"""
+    mask = 0
+    for c in set(s):
+        code = ord(c)
+        mask |= 1 << code if code < 128 else NON_ASCII_BIT
+    return mask
+
+
+def applicable_decoders(s, mask=None):
+    """只返回字母表和长度约束都满足的解码器 [(名称, 函数)]"""
+    if mask is None:
+        mask = profile_input(s)
+    # 换行折行的输入去掉所有空白后再检查长度
+    core_len = len(''.join(s.split()).rstrip('='))
+    result = []
+    for name, func in DECODERS:
+        allowed, length_ok = DECODER_RULES[name]
+        if mask & ~allowed:
+            continue
+        if length_ok is not None and not length_ok(len(s) if name in WHITESPACE_SIGNIFICANT else core_len):
+            continue
+        result.append((name, func))
+    return result
+
+
+# 每一层解码后长度占输入长度的最小比例（Base16 为 0.5，其余编码都更高），低于此值视为不合理的解码
+MIN_SHRINK_RATIO = 0.45
+
+
+def crack_layers(encoded, max_depth=20, beam_width=8):
+    """对多层嵌套编码做 beam search
+
+    每一层对当前保留的候选逐个尝试所有解码器，只保留长度按合理比例缩小且主要由可打印字符组成的结果，
+    已出现过的中间结果直接跳过；每层按 score_candidate 保留得分最高的 beam_width 个候选继续向下解。
+    无法再解出可打印结果的候选作为终点，返回 [(得分, 解码链, 结果)]，按得分和层数降序排列。
+    """
+    start = encoded.encode('utf-8') if isinstance(encoded, str) else encoded
+    seen = {start}
+    beam = [(1.0, [], start)]
+    leaves = []
+    for _ in range(max_depth):
+        children = []
+        for score, chain, data in beam:
+            expanded = False
+            try:
+                # 只去掉换行，空格在 Base45 字母表里是有效字符
+                text = data.decode('ascii').strip('\r\n')
+            except UnicodeDecodeError:
+                text = ''
+            for name, func in applicable_decoders(text) if text else ():
+                try:
+                    decoded = func(text)
+                except Exception:
+                    continue
+                if not decoded:
+                    continue
+                decoded = bytes(decoded)
+                if decoded in seen:
+                    continue
+                # 解码结果必须变短且不能短得离谱，否则认为这一分支解码不合理
+                if not MIN_SHRINK_RATIO * len(text) <= len(decoded) < len(text):
+                    continue
+                seen.add(decoded)
+                if is_printable(decoded):
+                    children.append((score_candidate(decoded), chain + [name], decoded))
+                    expanded = True
+            if not expanded and chain:
+                leaves.append((score, chain, data))
+        if not children:
+            break
+        children.sort(key=lambda node: node[0], reverse=True)
+        beam = children[:beam_width]
+    else:
+        leaves.extend(node for node in beam if node[1])
+    leaves.sort(key=lambda node: (node[0], len(node[1])), reverse=True)
+    return leaves
+
+
+def print_decoded(decoded_bytes, preview=None, total_len=None):
+    """preview 不为 None 时只打印前 preview 个字节并给出总长度"""
+    total_len = len(decoded_bytes) if total_len is None else total_len
+    if preview is not None:
+        decoded_bytes = decoded_bytes[:preview]
+    readable = decoded_bytes.decode('utf-8', errors='replace')
+    hexstr = decoded_bytes.hex()
+    print(f"【可读字符串】: \n{readable} \n【十六进制】: \n{hexstr}")
+    if len(decoded_bytes) < total_len:
+        print(f"【总长度】: {total_len} 字节 (仅显示前 {len(decoded_bytes)} 字节)")
+
+
+# --- 流式解码 ---
+# 按块对齐的编码可以分块解码：每次只解码输入中完整的块，不足一块的部分留到下一次
+STREAM_CHUNK_SIZE = 1 << 20
+STREAM_WHITESPACE = b" \t\r\n"
+URLSAFE_TO_STANDARD = bytes.maketrans(b"-_", b"+/")
+
+# 名称: (每块字符数, 解码函数, 解码最后不足一块的剩余数据的函数)
+STREAM_CODECS = {
+    "base16": (2, lambda b: base64.b16decode(b, casefold=True), None),
+    "base32": (8, lambda b: base64.b32decode(b, casefold=True),
+               lambda b: base64.b32decode(b + b'=' * (-len(b) % 8), casefold=True)),
+    "base64": (4, lambda b: base64.b64decode(b.translate(URLSAFE_TO_STANDARD), validate=True),
+               lambda b: base64.b64decode(b.translate(URLSAFE_TO_STANDARD) + b'=' * (-len(b) % 4))),
+    "ascii85": (5, base64.a85decode, base64.a85decode),
+    "base85": (5, base64.b85decode, base64.b85decode),
+}
+
+
+def detect_stream_codec(sample):
+    """根据输入开头的一段数据挑选第一个字母表匹配的可流式解码的编码"""
+    # 样本可能在任意位置截断，这里只检查字母表，不检查长度约束；空白和 stream_decode 一样先去掉
+    mask = profile_input(sample.translate(None, STREAM_WHITESPACE).decode('latin-1'))
+    names = {name for name, (allowed, _) in DECODER_RULES.items() if not mask & ~allowed}
+    for codec, name in (("base16", "Base16"), ("base32", "Base32"), ("base64", "Base64")):
+        if name in names:
+            return codec
+    if sample.lstrip().startswith(b'<~'):
+        return "ascii85"
+    return "base85" if "Base85" in names else None
+
+
+def stream_decode(src, sink, codec, chunk_size=STREAM_CHUNK_SIZE):
+    """从 src 分块读取编码数据，解码结果逐块交给 sink，返回解码后的总字节数
+
+    内存占用只与 chunk_size 有关。末尾的 '=' 填充会随最后一块一起解码。
+    """
+    block, decode, decode_tail = STREAM_CODECS[codec]
+    pending = b''
+    total = 0
+    first = True
+    done = False
+    while not done:
+        chunk = src.read(chunk_size)
+        if not chunk:
+            break
+        data = pending + chunk.translate(None, STREAM_WHITESPACE)
+        if codec == "ascii85":
+            # 去掉 <~ ~> 边界，'z' 展开为 '!!!!!' 以保证按 5 字符对齐
+            if first and data.startswith(b'<~'):
+                data = data[2:]
+            if b'~' in data:
+                data = data[:data.index(b'~')]
+                done = True
+            data = data.replace(b'z', b'!!!!!')
+        first = False
+        # '=' 只会出现在末尾，遇到时整段留给最后处理
+        pad = data.find(b'=')
+        cut = len(data) - len(data) % block if pad == -1 else pad - pad % block
+        if cut:
+            out = decode(data[:cut])
+            sink(out)
+            total += len(out)
+        pending = data[cut:]
+    pending = pending.rstrip(b'=') if decode_tail is not None else pending
+    if pending:
+        if decode_tail is None:
+            raise ValueError(f"输入末尾有 {len(pending)} 个字符无法组成完整的块")
+        out = decode_tail(pending)
+        sink(out)
+        total += len(out)
+    return total
+
+
+def run_stream(path, codec=None, output=None, preview=256):
+    src = sink_file = None
+    head = bytearray()
+
+    def sink(data):
+        if len(head) < preview:
+            head.extend(data[:preview - len(head)])
+        if sink_file:
+            sink_file.write(data)
+
+    try:
+        src = sys.stdin.buffer if path == '-' else open(path, 'rb')
+        sink_file = open(output, 'wb') if output else None
+        if codec is None:
+            sample = src.peek(STREAM_CHUNK_SIZE)[:STREAM_CHUNK_SIZE] if hasattr(src, 'peek') else b''
+            codec = detect_stream_codec(sample)
+            if codec is None:
+                print("无法从输入开头识别可流式解码的编码，请用 --codec 指定。")
+                return
+        print(f"\n--- 流式解码 ({codec}) ---\n" + "="*15)
+        total = stream_decode(src, sink, codec)
+        print_decoded(bytes(head), preview=preview, total_len=total)
+        if output:
+            print(f"解码结果已写入: {output}")
+    except OSError as e:
+        print(f"无法读写文件: {e}")
+    except (ValueError, binascii.Error) as e:
+        print(f"流式解码失败: {e}")
+    finally:
+        if src is not None and src is not sys.stdin.buffer:
+            src.close()
+        if sink_file:
+            sink_file.close()
+
+
+def run_recursive(encoded, max_depth, beam_width, top=3):
+    print(f"\n--- 多层解码结果 (最大深度 {max_depth}, beam 宽度 {beam_width}) ---\n" + "="*15)
+    leaves = crack_layers(encoded, max_depth, beam_width)
+    if not leaves:
+        print("未找到可继续解码的路径。")
+        return
+    for score, chain, data in leaves[:top]:
+        print(f"[{' -> '.join(chain)}] 层数: {len(chain)} 得分: {score:.3f}")
+        print_decoded(data)
+        print("\n" + "-"*15)
+
+
+# --- 批量模式 ---
+BATCH_PREVIEW = 64
+BATCH_CHUNKSIZE = 64
+
+
+def decode_all(encoded):
+    """对一条输入跑全部解码器，返回每个解码器的成功与否、得分和耗时"""
+    candidates = dict(applicable_decoders(encoded))
+    results = []
+    for name, func in DECODERS:
+        entry = {"decoder": name, "ok": False, "skipped": name not in candidates}
+        if not entry["skipped"]:
+            start = time.perf_counter()
+            try:
+                decoded = func(encoded)
+            except Exception:
+                decoded = None
+            entry["seconds"] = round(time.perf_counter() - start, 6)
+            if decoded:
+                decoded = bytes(decoded)
+                entry.update(ok=True, score=round(score_candidate(decoded), 4), length=len(decoded),
+                             preview=decoded[:BATCH_PREVIEW].decode('utf-8', errors='replace'))
+        results.append(entry)
+    return results
+
+
+def _batch_task(item):
+    line_no, encoded = item
+    results = decode_all(encoded)
+    decoded = [r for r in results if r["ok"]]
+    best = max(decoded, key=lambda r: r["score"])["decoder"] if decoded else None
+    return {"line": line_no, "input": encoded[:BATCH_PREVIEW], "best": best, "results": results}
+
+
+def iter_corpus(f, field="data"):
+    """逐行读取语料：JSON 对象取 field 字段，JSON 字符串直接使用，其余按原始文本处理"""
+    for line_no, line in enumerate(f, 1):
+        line = line.strip()
+        if not line:
+            continue
+        if line[0] in '{"':
+            try:
+                value = json.loads(line)
+            except ValueError:
+                value = line
+            if isinstance(value, dict):
+                value = value.get(field)
+            if not isinstance(value, str):
+                continue
+            line = value.strip()
+        yield line_no, line
+
+
+def run_batch(corpus, output=None, field="data", workers=None):
+    """进程池按 BATCH_CHUNKSIZE 条一组分发任务，结果按输入顺序逐条写出 JSONL"""
+    src = out = None
+    count = 0
+    start = time.perf_counter()
+    try:
+        src = sys.stdin if corpus == '-' else open(corpus, encoding='utf-8', errors='replace')
+        out = open(output, 'w', encoding='utf-8') if output else sys.stdout
+        with multiprocessing.Pool(workers or os.cpu_count() or 1) as pool:
+            for record in pool.imap(_batch_task, iter_corpus(src, field), chunksize=BATCH_CHUNKSIZE):
+                out.write(json.dumps(record, ensure_ascii=False) + "\n")
+                count += 1
+    except OSError as e:
+        print(f"无法读写文件: {e}", file=sys.stderr)
+        return
+    finally:
+        if src is not None and src is not sys.stdin:
+            src.close()
+        if out is not None and out is not sys.stdout:
+            out.close()
+    elapsed = time.perf_counter() - start
+    print(f"批量解码完成: {count} 条, 耗时 {elapsed:.2f} 秒", file=sys.stderr)
+
 
 # --- 主逻辑 ---
 def main():
+    parser = argparse.ArgumentParser(description="Base解码工具 (支持 Base16, 32, 36, 45, 58, 62, 64, 85, 91, 92)")
+    parser.add_argument('encoded', nargs='?', help="编码字符串，不提供时交互输入")
+    parser.add_argument('-r', '--recursive', action='store_true', help="自动逐层解码多层嵌套的编码")
+    parser.add_argument('--depth', type=int, default=20, help="多层解码的最大深度，默认 20")
+    parser.add_argument('--beam', type=int, default=8, help="多层解码每层保留的候选数，默认 8")
+    parser.add_argument('--bench-radix', nargs='?', const=10 * 1024 * 1024, type=int, metavar='MAX_BYTES',
+                        help="运行 Base36/58/62 进制转换基准测试 (默认从 1 KB 到 10 MB)")
+    parser.add_argument('-f', '--file', metavar='PATH',
+                        help="从文件读取输入，'-' 表示标准输入；未指定 -r 时按块流式解码")
+    parser.add_argument('--codec', choices=sorted(STREAM_CODECS),
+                        help="流式解码使用的编码，默认根据输入开头自动识别")
+    parser.add_argument('-o', '--output', metavar='PATH', help="流式解码结果或批量模式的 JSONL 结果写入的文件")
+    parser.add_argument('--preview', type=int, default=256, help="流式解码时控制台只显示的前 N 个字节，默认 256")
+    parser.add_argument('--batch', metavar='CORPUS',
+                        help="批量模式：逐行读取 JSONL/纯文本语料 ('-' 为标准输入)，每条输出一行 JSONL 结果 (写入 -o 或标准输出)")
+    parser.add_argument('--field', default='data', help="批量模式下 JSONL 中编码字符串所在的字段，默认 data")
+    parser.add_argument('-j', '--workers', type=int, default=None, help="批量模式的进程数，默认为 CPU 核心数")
+    args = parser.parse_args()
+
+    if args.batch:
+        run_batch(args.batch, args.output, args.field, args.workers)
+        return
+    if args.bench_radix:
+        bench_radix(args.bench_radix)
+        return
+
     print("Base解码工具 (支持 Base16, 32, 36, 45, 58, 62, 64, 85, 91, 92)")
-    encoded = input("请输入编码字符串: ").strip()
+    if args.file and not args.recursive:
+        run_stream(args.file, args.codec, args.output, args.preview)
+        return
+    if args.file:
+        try:
+            with (sys.stdin if args.file == '-' else open(args.file, encoding='latin-1')) as f:
+                args.encoded = f.read()
+        except OSError as e:
+            print(f"无法读取文件: {e}")
+            return
+    encoded = (args.encoded or input("请输入编码字符串: ")).strip()
     if not encoded:
         print("输入不能为空")
         return
-    decoders = [
-        ("Base16", decode_base16),
-        ("Base32", decode_base32),
-        ("Base36", decode_base36),
-        ("Base45", decode_base45),
-        ("Base58", decode_base58),
-        ("Base62", decode_base62),
-        ("Base64", decode_base64),
-        ("Base85", decode_base85),
-        ("Base91", decode_base91),
-        ("Base92", decode_base92),
-    ]
+    if args.recursive:
+        run_recursive(encoded, args.depth, args.beam)
+        return
     print("\n--- 解码结果 ---\n" + "="*15)
-    for name, func in decoders:
+    candidates = dict(applicable_decoders(encoded))
+    for name, func in DECODERS:
         print(f"[{name}]🤡🤡🤡🤡")
+        if name not in candidates:
+            print("跳过：输入包含该编码字母表之外的字符或长度不符。")
+            print("\n" + "-"*15)
+            continue
         try:
             decoded_bytes = func(encoded)
             if decoded_bytes is not None:
                 try:
-                    readable = decoded_bytes.decode('utf-8', errors='replace')
-                    hexstr = decoded_bytes.hex()
-                    print(f"【可读字符串】: \n{readable} \n【十六进制】: \n{hexstr}")
+                    print_decoded(decoded_bytes)
                 except Exception as e:
                     print(f"解码错误: {e}", end=" ")
             else:
@@ -1,52 +1,372 @@
+import os
+import re
 import sys
-from PIL import Image
+import glob
+import json
+import time
+import hashlib
+import functools
+import argparse
+import multiprocessing
+from PIL import Image, ImageOps, ImageFilter, ImageSequence
 from pyzbar.pyzbar import decode
 
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+IMAGE_EXTENSIONS = ('.png', '.jpg', '.jpeg', '.bmp', '.gif', '.tif', '.tiff', '.webp')
+# 自适应阈值的邻域半径与偏移
+THRESHOLD_RADIUS = 15
+THRESHOLD_OFFSET = 8
+# 四周补白的宽度，二维码静区被裁掉时很有用
+PAD_BORDER = 32
+# 合成模式：逐帧累积 OR/XOR，或按尺寸把碎片拼成网格
+COMPOSITE_MODES = ('or', 'xor', 'stitch')
+# 低于该灰度的像素算作深色模块
+DARK_LEVEL = 128
+DEFAULT_CACHE = os.path.join(os.path.expanduser('~'), '.cache', 'fqrcode.json')
+# 缓存上限：最多保留的条目数、多久没用过就丢弃，以及命中时多久才刷新一次使用时间 (秒)
+CACHE_MAX_ENTRIES = 4096
+CACHE_MAX_AGE = 30 * 24 * 3600
+CACHE_TOUCH_INTERVAL = 24 * 3600
+
 
 def print_usage():
     print("用法：python qr_decode.py [二维码图片路径]")
     print("示例：python qr_decode.py qrcode.png")
 
 
+def adaptive_threshold(gray, radius=THRESHOLD_RADIUS, offset=THRESHOLD_OFFSET):
+    """每个像素与邻域均值比较，比全局阈值更能应付光照不均和污损"""
+    if np is None:
+        mean = gray.filter(ImageFilter.BoxBlur(radius))
+        return Image.frombytes('L', gray.size, bytes(
+            255 if g > m - offset else 0 for g, m in zip(gray.tobytes(), mean.tobytes())))
+    a = np.asarray(gray, dtype=np.int64)
+    h, w = a.shape
+    # 积分图求邻域和，边界处按实际覆盖的像素数取平均
+    integral = np.zeros((h + 1, w + 1), dtype=np.int64)
+    integral[1:, 1:] = a.cumsum(0).cumsum(1)
+    y0 = np.clip(np.arange(h) - radius, 0, h)
+    y1 = np.clip(np.arange(h) + radius + 1, 0, h)
+    x0 = np.clip(np.arange(w) - radius, 0, w)
+    x1 = np.clip(np.arange(w) + radius + 1, 0, w)
+    total = integral[y1][:, x1] - integral[y0][:, x1] - integral[y1][:, x0] + integral[y0][:, x0]
+    count = (y1 - y0)[:, None] * (x1 - x0)[None, :]
+    return Image.fromarray(np.where(a * count > total - offset * count, 255, 0).astype(np.uint8), 'L')
+
+
+def _scale(img, factor):
+    size = (max(1, int(img.width * factor)), max(1, int(img.height * factor)))
+    # 放大用最近邻保持模块边缘锐利，缩小用 LANCZOS 抹掉噪点
+    return img.resize(size, Image.NEAREST if factor > 1 else Image.LANCZOS)
+
+
+def _pad(img):
+    return ImageOps.expand(img, PAD_BORDER, fill=255 if img.mode == 'L' else (255, 255, 255))
+
+
+class _LadderViews:
+    """一张图在预处理阶梯上共用的中间结果，第一次用到时才计算，之后每一步直接复用"""
+
+    def __init__(self, rgb):
+        self.rgb = rgb
+
+    @functools.cached_property
+    def gray(self):
+        return ImageOps.grayscale(self.rgb)
+
+    @functools.cached_property
+    def threshold(self):
+        return adaptive_threshold(self.gray)
+
+
+# 预处理阶梯：(名称, 基于 _LadderViews 的变换)，按代价从低到高排列，第一次识别成功就停止
+LADDER = [
+    ('rgb', lambda views: views.rgb),
+    ('gray', lambda views: views.gray),
+    ('autocontrast', lambda views: ImageOps.autocontrast(views.gray)),
+    ('threshold', lambda views: views.threshold),
+    ('invert', lambda views: ImageOps.invert(views.gray)),
+    ('threshold+invert', lambda views: ImageOps.invert(views.threshold)),
+    ('pad', lambda views: _pad(views.gray)),
+    ('pad+threshold', lambda views: _pad(views.threshold)),
+    ('scale2x', lambda views: _pad(_scale(views.threshold, 2))),
+    ('scale0.5', lambda views: _pad(adaptive_threshold(_scale(views.gray, 0.5)))),
+    ('scale4x+invert', lambda views: _pad(ImageOps.invert(_scale(views.threshold, 4)))),
+]
+
+
+def decode_ladder(img, ladder=LADDER):
+    """依次尝试阶梯上的预处理，返回 (步骤名, 解码结果)；全部失败返回 (None, [])"""
+    views = _LadderViews(img.convert('RGB'))
+    for name, transform in ladder:
+        decoded_objects = decode(transform(views))
+        if decoded_objects:
+            return name, decoded_objects
+    return None, []
+
+
+def iter_frames(img):
+    """逐帧产出 (帧号, 帧)，静态图只有第 0 帧"""
+    for index, frame in enumerate(ImageSequence.Iterator(img)):
+        yield index, frame
+
+
+def decode_file(task):
+    """进程池任务：解码一个文件的所有帧，返回 (路径, [(帧号, 步骤名, [(类型, 数据)])], 错误信息)"""
+    img_path, ladder_steps = task
+    ladder = LADDER[:ladder_steps]
+    results = []
+    try:
+        with Image.open(img_path) as img:
+            for index, frame in iter_frames(img):
+                step, decoded_objects = decode_ladder(frame, ladder)
+                if decoded_objects:
+                    # pyzbar 的结果对象不能跨进程传递，只取需要的字段
+                    results.append((index, step, [(obj.type, obj.data) for obj in decoded_objects]))
+    except FileNotFoundError:
+        return img_path, results, f"文件 '{img_path}' 不存在"
+    except Exception as e:
+        return img_path, results, str(e)
+    return img_path, results, None
+
+
+def iter_image_paths(targets):
+    """展开命令行给出的文件、目录和通配符"""
+    for target in targets:
+        if os.path.isdir(target):
+            for root, _, files in os.walk(target):
+                for name in sorted(files):
+                    if name.lower().endswith(IMAGE_EXTENSIONS):
+                        yield os.path.join(root, name)
+        elif glob.has_magic(target):
+            # 通配符可能匹配到目录，只保留文件
+            yield from sorted(path for path in glob.glob(target, recursive=True) if os.path.isfile(path))
+        else:
+            yield target
+
+
+def format_content(data):
+    try:
+        return data.decode('utf-8')
+    except UnicodeDecodeError:
+        return f"[二进制数据] {data.hex()}"
+
+
+def print_results(results, multi_frame=False):
+    codes = [(index, step, item) for index, step, items in results for item in items]
+    print(f"成功识别 {len(codes)} 个二维码：")
+    for i, (index, step, (code_type, data)) in enumerate(codes, 1):
+        print(f"\n二维码 {i}:")
+        if multi_frame:
+            print(f"帧：{index}")
+        if step != LADDER[0][0]:
+            print(f"预处理：{step}")
+        print(f"类型：{code_type}")
+        print(f"内容：{format_content(data)}")
+
+
+def batch_decode(paths, ladder_steps, workers=None):
+    """每个文件一个任务交给进程池，完成一个打印一个"""
+    found = 0
+    tasks = [(path, ladder_steps) for path in paths]
+    with multiprocessing.Pool(workers or os.cpu_count() or 1) as pool:
+        for img_path, results, error in pool.imap_unordered(decode_file, tasks):
+            if error:
+                print(f"{img_path}: 解码失败：{error}")
+                continue
+            for index, step, items in results:
+                found += len(items)
+                for code_type, data in items:
+                    print(f"{img_path}#{index} [{step}] {code_type}: {format_content(data)}")
+    print(f"\n共识别 {found} 个二维码，处理 {len(tasks)} 个文件")
+
+
+def _natural_key(path):
+    # tile_2.png 排在 tile_10.png 前面
+    return [int(part) if part.isdigit() else part for part in re.split(r'(\d+)', path)]
+
+
+def iter_layers(paths):
+    """逐帧惰性产出 (帧名, 内容哈希, 深色掩码)，同一时刻只解码一帧"""
+    for path in paths:
+        with Image.open(path) as img:
+            for index, frame in iter_frames(img):
+                gray = frame.convert('L')
+                digest = hashlib.sha1(b'%dx%d' % gray.size + gray.tobytes()).hexdigest()
+                yield f"{path}#{index}", digest, np.asarray(gray) < DARK_LEVEL
+
+
+def _fit(mask, shape):
+    if mask.shape == shape:
+        return mask
+    img = Image.fromarray(mask).resize((shape[1], shape[0]), Image.NEAREST)
+    return np.asarray(img)
+
+
+def _grid_shapes(count):
+    return [(rows, count // rows) for rows in range(1, count + 1) if count % rows == 0]
+
+
+def iter_composites(layers, mode):
+    """产出 (合成名, 缓存键, 深色掩码)
+
+    or/xor 每加入一帧产出一次累积结果，只保留一张累加图；
+    stitch 需要所有碎片，按最常见的尺寸对齐后尝试每种行列组合的行优先和列优先排列。
+    缓存键由模式和参与合成的各帧内容哈希串联得到。
+    """
+    if mode in ('or', 'xor'):
+        combine = np.logical_or if mode == 'or' else np.logical_xor
+        chain = hashlib.sha1(mode.encode())
+        acc = None
+        for count, (name, digest, mask) in enumerate(layers, 1):
+            chain.update(digest.encode())
+            if acc is None:
+                acc = mask.copy()
+            else:
+                combine(acc, _fit(mask, acc.shape), out=acc)
+            yield f"{mode}[{count}] ..{name}", chain.hexdigest(), acc
+        return
+
+    tiles = list(layers)
+    if not tiles:
+        return
+    shapes = [mask.shape for _, _, mask in tiles]
+    shape = max(set(shapes), key=shapes.count)
+    masks = [_fit(mask, shape) for _, _, mask in tiles]
+    digests = ''.join(digest for _, digest, _ in tiles)
+    for rows, cols in _grid_shapes(len(masks)):
+        for order in ('row', 'col') if rows > 1 and cols > 1 else ('row',):
+            if order == 'row':
+                grid = [masks[r * cols:(r + 1) * cols] for r in range(rows)]
+            else:
+                grid = [masks[r::rows] for r in range(rows)]
+            key = hashlib.sha1(f"stitch{rows}x{cols}{order}{digests}".encode()).hexdigest()
+            yield f"stitch {rows}x{cols} {order}", key, np.block(grid)
+
+
+def load_cache(path):
+    if not path or not os.path.exists(path):
+        return {}
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def prune_cache(cache, now=None):
+    """丢掉超过 CACHE_MAX_AGE 没用过的条目，剩下的按最近使用时间只留 CACHE_MAX_ENTRIES 条"""
+    now = time.time() if now is None else now
+    # 旧格式的条目没有使用时间，按最久未用处理
+    live = [(entry[2] if len(entry) > 2 else 0, key) for key, entry in cache.items()]
+    live = sorted((t, key) for t, key in live if now - t <= CACHE_MAX_AGE)[-CACHE_MAX_ENTRIES:]
+    return {key: cache[key] for _, key in live}
+
+
+def save_cache(cache, path):
+    if not path:
+        return
+    cache = prune_cache(cache)
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    tmp = path + '.tmp'
+    with open(tmp, 'w', encoding='utf-8') as f:
+        json.dump(cache, f)
+    os.replace(tmp, path)
+
+
+def decode_composites(paths, mode, ladder_steps, cache_path=DEFAULT_CACHE):
+    """对每个合成结果跑预处理阶梯，命中缓存的直接复用；产出 (合成名, 步骤名, [(类型, 数据)], 是否命中缓存)
+
+    缓存条目为 [步骤名, [(类型, 数据hex)], 最近使用时间]，写回时由 prune_cache 按时间和条数淘汰。
+    """
+    cache = load_cache(cache_path)
+    ladder = LADDER[:ladder_steps]
+    # 只有新增条目或刷新了使用时间才重写缓存文件，全部命中时不动它
+    dirty = False
+    try:
+        for name, key, mask in iter_composites(iter_layers(paths), mode):
+            key = f"{key}:{ladder_steps}"
+            now = time.time()
+            if key in cache:
+                entry = cache[key]
+                if len(entry) < 3 or now - entry[2] > CACHE_TOUCH_INTERVAL:
+                    cache[key] = entry[:2] + [now]
+                    dirty = True
+                step, items = entry[:2]
+                yield name, step, [(code_type, bytes.fromhex(data)) for code_type, data in items], True
+                continue
+            step, decoded_objects = decode_ladder(Image.fromarray(np.where(mask, 0, 255).astype(np.uint8), 'L'), ladder)
+            items = [(obj.type, obj.data) for obj in decoded_objects]
+            # 失败也缓存，重复运行时不再爬一遍阶梯
+            cache[key] = [step, [(code_type, data.hex()) for code_type, data in items], now]
+            dirty = True
+            yield name, step, items, False
+    finally:
+        if dirty:
+            save_cache(cache, cache_path)
+
+
+def composite_main(paths, mode, ladder_steps, cache_path):
+    if np is None:
+        print("错误：合成模式需要 numpy")
+        sys.exit(1)
+    found = hits = total = 0
+    for name, step, items, cached in decode_composites(sorted(paths, key=_natural_key), mode, ladder_steps,
+                                                       cache_path):
+        total += 1
+        hits += cached
+        for code_type, data in items:
+            found += 1
+            print(f"{name} [{step}] {code_type}: {format_content(data)}")
+    print(f"\n共识别 {found} 个二维码，尝试 {total} 个合成结果（缓存命中 {hits}）")
+
+
 def main():
+    parser = argparse.ArgumentParser(description="二维码/条码识别，支持目录批量、GIF 逐帧和预处理阶梯")
+    parser.add_argument('images', nargs='*', help="二维码图片路径、目录或通配符")
+    parser.add_argument('-j', '--workers', type=int, help="批量模式的进程数，默认 CPU 核数")
+    parser.add_argument('--steps', type=int, default=len(LADDER),
+                        help=f"最多尝试的预处理步数，1 表示只按原图识别，默认 {len(LADDER)}")
+    parser.add_argument('--composite', choices=COMPOSITE_MODES,
+                        help="把所有帧/碎片合成后再识别：or/xor 逐帧累积，stitch 按网格拼接")
+    parser.add_argument('--cache', default=DEFAULT_CACHE,
+                        help=f"合成模式的结果缓存，默认 {DEFAULT_CACHE}；最多 {CACHE_MAX_ENTRIES} 条，"
+                             f"{CACHE_MAX_AGE // 86400} 天未用的条目自动丢弃")
+    parser.add_argument('--no-cache', action='store_true', help="合成模式不读写缓存")
+    args = parser.parse_args()
+
     # 检查参数数量
-    if len(sys.argv) != 2:
+    if not args.images:
         print("错误：缺少图片路径参数")
         print_usage()
         sys.exit(1)
 
-    # 获取图片路径
-    img_path = sys.argv[1]
+    paths = list(iter_image_paths(args.images))
+    if args.composite:
+        composite_main(paths, args.composite, args.steps, None if args.no_cache else args.cache)
+        return
+    if len(paths) != 1 or os.path.isdir(args.images[0]) or glob.has_magic(args.images[0]):
+        batch_decode(paths, args.steps, args.workers)
+        return
 
-    try:
-        # 打开并预处理图片
-        with Image.open(img_path) as img:
-            # 转换为RGB模式以兼容所有格式
-            rgb_img = img.convert('RGB')
-
-            # 解码二维码
-            decoded_objects = decode(rgb_img)
-
-            if decoded_objects:
-                print(f"成功识别 {len(decoded_objects)} 个二维码：")
-                for i, obj in enumerate(decoded_objects, 1):
-                    try:
-                        content = obj.data.decode('utf-8')
-                    except UnicodeDecodeError:
-                        content = f"[二进制数据] {obj.data.hex()}"
-                    print(f"\n二维码 {i}:")
-                    print(f"类型：{obj.type}")
-                    print(f"内容：{content}")
-            else:
-                print("未识别到二维码，请检查：")
-                print("1. 图片是否包含有效二维码")
-                print("2. 图片是否足够清晰")
-    except FileNotFoundError:
-        print(f"错误：文件 '{img_path}' 不存在")
-        sys.exit(2)
-    except Exception as e:
-        print(f"解码失败：{str(e)}")
+    # 单个文件：在当前进程里解码，输出格式与以前一致
+    img_path, results, error = decode_file((paths[0], args.steps))
+    if error:
+        if not os.path.exists(img_path):
+            print(f"错误：{error}")
+            sys.exit(2)
+        print(f"解码失败：{error}")
         sys.exit(3)
+    if results:
+        print_results(results, multi_frame=any(index for index, _, _ in results))
+    else:
+        print("未识别到二维码，请检查：")
+        print("1. 图片是否包含有效二维码")
+        print("2. 图片是否足够清晰")
 
 
 if __name__ == "__main__":
@@ -54,4 +374,4 @@ if __name__ == "__main__":
         main()
     except KeyboardInterrupt:
         print("\n操作已取消")
-        sys.exit(0)
\ No newline at end of file
+        sys.exit(0)
@@ -1,20 +1,95 @@
 import os
-import sys
+import glob
+import json
+import time
+import mmap
+import shutil
 import struct
+import argparse
+import multiprocessing
 import binascii
+import zlib
+
+
+PNG_SIGNATURE = b'\x89PNG\r\n\x1a\n'
+# 计算大块数据 CRC 时每次处理的字节数，保证内存占用恒定
+CRC_BLOCK_SIZE = 1 << 20
+
+
+class PngChunk:
+    """PNG 中的一个数据块，offset 指向块开头的长度字段"""
+
+    def __init__(self, offset, length, chunk_type, stored_crc, computed_crc):
+        self.offset = offset
+        self.length = length
+        self.type = chunk_type
+        self.stored_crc = stored_crc
+        self.computed_crc = computed_crc
+
+    @property
+    def data_offset(self):
+        return self.offset + 8
+
+    @property
+    def crc_offset(self):
+        return self.offset + 8 + self.length
+
+    @property
+    def crc_ok(self):
+        return self.stored_crc == self.computed_crc
+
+
+def _chunk_crc(view, start, end):
+    crc = 0
+    for pos in range(start, end, CRC_BLOCK_SIZE):
+        crc = binascii.crc32(view[pos:min(pos + CRC_BLOCK_SIZE, end)], crc)
+    return crc & 0xffffffff
+
+
+def iter_png_chunks(view):
+    """逐块遍历 PNG（view 为 mmap/memoryview），校验每个块的 CRC
+
+    只按块头中的长度字段跳转，不依赖固定偏移；文件被截断时在最后一个完整块处停止。
+    """
+    if bytes(view[:8]) != PNG_SIGNATURE:
+        raise ValueError("文件头不是 PNG 签名")
+    pos = 8
+    size = len(view)
+    while pos + 12 <= size:
+        length, = struct.unpack_from('>I', view, pos)
+        crc_pos = pos + 8 + length
+        if crc_pos + 4 > size:
+            break
+        chunk_type = bytes(view[pos + 4:pos + 8])
+        stored_crc, = struct.unpack_from('>I', view, crc_pos)
+        yield PngChunk(pos, length, chunk_type, stored_crc, _chunk_crc(view, pos + 4, crc_pos))
+        pos = crc_pos + 4
+        if chunk_type == b'IEND':
+            break
+
+
+def open_png(file_path):
+    """以只读 mmap 打开 PNG，由调用方负责关闭"""
+    with open(file_path, 'rb') as f:
+        return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+
+def find_chunk(view, chunk_type):
+    for chunk in iter_png_chunks(view):
+        if chunk.type == chunk_type:
+            return chunk
+    return None
 
 
 # 获取PNG文件CRC值的函数
 def calculate_png_crc(file_path):
     try:
-        with open(file_path, 'rb') as file:
-            # 读取 PNG 文件的内容
-            png_data = file.read()
-            # 读取从第 30 位到第 33 位的 CRC 值（注意这里的索引是从 0 开始）
-            crc_data = png_data[29:33]
-            # 将读取到的字节数据转换为整数
-            crc = struct.unpack('>I', crc_data)[0]
-            return crc
+        with open_png(file_path) as mm:
+            # 通过遍历数据块定位 IHDR，而不是假定 CRC 位于第 30 到 33 字节
+            ihdr = find_chunk(mm, b'IHDR')
+            if ihdr is None:
+                raise ValueError("未找到 IHDR 块")
+            return ihdr.stored_crc
     except FileNotFoundError:
         print(f"Error: 文件 '{file_path}' 未找到，请检查文件路径是否正确。")
         return None
@@ -23,67 +98,572 @@ def calculate_png_crc(file_path):
         return None
 
 
+def repaired_path(file_path):
+    base_name = os.path.basename(file_path)
+    dir_name = os.path.dirname(file_path)
+    return os.path.join(dir_name, os.path.splitext(base_name)[0] + "_v2.png")
+
+
+def write_patches(file_path, patches, in_place=False):
+    """把 [(偏移, 字节)] 形式的修改写入文件
+
+    in_place 为真时直接改写原文件；否则先流式复制为 *_v2.png 再改写副本。
+    两种方式都只改动损坏的字节，内存占用与文件大小无关。返回被写入的文件路径。
+    """
+    target = file_path if in_place else repaired_path(file_path)
+    if not in_place:
+        shutil.copyfile(file_path, target)
+    with open(target, 'r+b') as f:
+        for offset, data in patches:
+            f.seek(offset)
+            f.write(data)
+    return target
+
+
+def crc_patches(chunks):
+    """为 CRC 错误的块生成把 CRC 改为正确值的修改"""
+    return [(c.crc_offset, struct.pack('>I', c.computed_crc)) for c in chunks if not c.crc_ok]
+
+
+# IHDR 的 CRC 覆盖 "IHDR" + 13 字节数据，宽高分别位于其中第 4~7、8~11 字节
+IHDR_CRC_LEN = 17
+WIDTH_OFFSET = 4
+HEIGHT_OFFSET = 8
+
+
+def _crc_linear_tables(offset, total_len=IHDR_CRC_LEN):
+    """生成某个 4 字节字段对 CRC 的线性贡献表（按字节拆成 4 张 256 项的表）"""
+    zero_crc = binascii.crc32(bytes(total_len))
+    buf = bytearray(total_len)
+    tables = []
+    for k in range(4):
+        table = []
+        for b in range(256):
+            buf[offset + k] = b
+            table.append(binascii.crc32(buf) ^ zero_crc)
+        buf[offset + k] = 0
+        tables.append(table)
+    return tables
+
+
+def _apply_tables(tables, value):
+    return (tables[0][value >> 24] ^ tables[1][(value >> 16) & 0xff]
+            ^ tables[2][(value >> 8) & 0xff] ^ tables[3][value & 0xff])
+
+
+def _invert_tables(tables):
+    """在 GF(2) 上对 32x32 的线性映射求逆，结果同样以 4 张字节表表示"""
+    rows = [[_apply_tables(tables, 1 << i), 1 << i] for i in range(32)]
+    for bit in range(32):
+        mask = 1 << bit
+        pivot = next(r for r in range(bit, 32) if rows[r][0] & mask)
+        rows[bit], rows[pivot] = rows[pivot], rows[bit]
+        for r in range(32):
+            if r != bit and rows[r][0] & mask:
+                rows[r][0] ^= rows[bit][0]
+                rows[r][1] ^= rows[bit][1]
+    # rows[bit][1] 即为输出第 bit 位对应的输入
+    inverse = []
+    for k in range(4):
+        table = []
+        for b in range(256):
+            value = 0
+            for i in range(8):
+                if b >> i & 1:
+                    value ^= rows[(3 - k) * 8 + i][1]
+            table.append(value)
+        inverse.append(table)
+    return inverse
+
+
+def solve_dimensions_crc(ihdr, target_crc, widths=range(1, 4096), heights=range(1, 4096), stop=None, limit=None):
+    """利用 CRC32 的线性性求解宽高
+
+    ihdr 为 "IHDR" + 13 字节数据。CRC(数据) = CRC(宽高置零) ^ L_w(宽) ^ L_h(高)，
+    且 L_w、L_h 都是可逆线性映射，因此只需遍历范围较小的一个轴，另一个轴直接求逆得到，
+    复杂度为 O(min(宽, 高))。返回按 (宽, 高) 排序的匹配，limit 不为 None 时最多 limit 组。
+    """
+    base = bytearray(ihdr[:IHDR_CRC_LEN])
+    base[WIDTH_OFFSET:HEIGHT_OFFSET + 4] = bytes(8)
+    residual = (binascii.crc32(base) ^ target_crc) & 0xffffffff
+
+    width_tables = _crc_linear_tables(WIDTH_OFFSET)
+    height_tables = _crc_linear_tables(HEIGHT_OFFSET)
+
+    # 遍历较短的轴，另一轴通过逆映射求出后只需判断是否落在范围内
+    if len(heights) <= len(widths):
+        outer, inner = heights, widths
+        outer_tables, inner_inverse = height_tables, _invert_tables(width_tables)
+    else:
+        outer, inner = widths, heights
+        outer_tables, inner_inverse = width_tables, _invert_tables(height_tables)
+
+    matches = []
+    for n, v in enumerate(outer):
+        if stop is not None and n & 0xfff == 0 and stop.is_set():
+            break
+        u = _apply_tables(inner_inverse, residual ^ _apply_tables(outer_tables, v))
+        if u in inner:
+            matches.append((u, v) if outer is heights else (v, u))
+            if limit is not None and len(matches) >= limit:
+                break
+    matches.sort()
+    return matches
+
+
+def solve_dimensions_brute(ihdr, target_crc, widths=range(1, 4096), heights=range(1, 4096), stop=None, limit=None):
+    """逐个遍历宽高计算 CRC，仅作为参考实现用于交叉验证"""
+    matches = []
+    for i in widths:
+        if stop is not None and stop.is_set():
+            break
+        for j in heights:
+            data = ihdr[0:4] + struct.pack('>I', i) + struct.pack('>I', j) + ihdr[12:17]
+            crc32 = binascii.crc32(data) & 0xffffffff
+            if crc32 == target_crc:
+                matches.append((i, j))
+                if limit is not None and len(matches) >= limit:
+                    return matches
+    return matches
+
+
+SOLVERS = {
+    'crc': solve_dimensions_crc,
+    'brute': solve_dimensions_brute,
+}
+
+# 单进程即可快速完成的工作量，低于该值时不启动进程池
+PARALLEL_THRESHOLD = 1 << 16
+
+# 碰撞过多时只列出前若干组
+MAX_LISTED = 20
+# 未指定 --first 时最多收集的匹配数；范围接近 2^32 时几乎每个值都有碰撞，全部收集会耗尽内存
+MAX_MATCHES = 1 << 16
+
+_stop_event = None
+
+
+def _init_worker(stop_event):
+    global _stop_event
+    _stop_event = stop_event
+
+
+def _solve_shard(task):
+    engine, ihdr, target_crc, widths, heights, limit = task
+    return SOLVERS[engine](ihdr, target_crc, widths, heights, stop=_stop_event, limit=limit)
+
+
+def _split_range(r, parts):
+    step = max(1, -(-len(r) // parts))
+    return [r[k:k + step] for k in range(0, len(r), step)]
+
+
+def search_dimensions(ihdr, target_crc, engine='crc', max_width=4096, max_height=4096,
+                      workers=None, first_only=False):
+    """在 [1, max_width) x [1, max_height) 内搜索匹配的宽高 (PNG 的宽高不能为 0)
+
+    工作量较大时用进程池把遍历轴切分到所有核心上；first_only 为真时找到一组即停止，
+    否则最多收集 MAX_MATCHES 组。达到上限后通过共享 Event 通知其余进程立即停止。
+    """
+    widths, heights = range(1, max_width), range(1, max_height)
+    limit = 1 if first_only else MAX_MATCHES
+    workers = workers or os.cpu_count() or 1
+    # brute 按宽度轴遍历，crc 遍历较短的轴
+    if engine == 'crc':
+        work = min(max_width, max_height)
+        split_width = max_width <= max_height
+    else:
+        work = max_width * max_height
+        split_width = True
+    if workers <= 1 or work < PARALLEL_THRESHOLD:
+        return SOLVERS[engine](ihdr, target_crc, widths, heights, limit=limit)
+
+    stop_event = multiprocessing.Event()
+    if split_width:
+        tasks = [(engine, ihdr, target_crc, shard, heights, limit)
+                 for shard in _split_range(widths, workers * 4)]
+    else:
+        tasks = [(engine, ihdr, target_crc, widths, shard, limit)
+                 for shard in _split_range(heights, workers * 4)]
+
+    matches = []
+    with multiprocessing.Pool(workers, initializer=_init_worker, initargs=(stop_event,)) as pool:
+        for result in pool.imap_unordered(_solve_shard, tasks):
+            matches.extend(result)
+            if len(matches) >= limit:
+                stop_event.set()
+                break
+    matches.sort()
+    return matches[:limit]
+
+
+# 各颜色类型的通道数: 灰度、RGB、索引色、灰度+Alpha、RGBA
+CHANNELS = {0: 1, 2: 3, 3: 1, 4: 2, 6: 4}
+# 每一行的第一个字节是过滤类型，合法值只有 0~4
+FILTER_TYPES = bytes(range(5))
+# 流式解压时每次产出的最大字节数
+INFLATE_BLOCK_SIZE = 1 << 20
+
+
+def iter_idat_raw(view, chunks):
+    """流式解压所有 IDAT 块，逐段产出解压后的数据，每段不超过 INFLATE_BLOCK_SIZE"""
+    inflater = zlib.decompressobj()
+    for chunk in chunks:
+        if chunk.type != b'IDAT':
+            continue
+        for pos in range(chunk.data_offset, chunk.crc_offset, CRC_BLOCK_SIZE):
+            data = view[pos:min(pos + CRC_BLOCK_SIZE, chunk.crc_offset)]
+            while data:
+                out = inflater.decompress(data, INFLATE_BLOCK_SIZE)
+                if out:
+                    yield out
+                data = inflater.unconsumed_tail
+            if inflater.eof:
+                return
+    out = inflater.flush()
+    if out:
+        yield out
+
+
+def _divisors(n):
+    small, large = [], []
+    d = 1
+    while d * d <= n:
+        if n % d == 0:
+            small.append(d)
+            if d * d != n:
+                large.append(n // d)
+        d += 1
+    return small + large[::-1]
+
+
+def solve_dimensions_idat(view, chunks, bit_depth, color_type, max_width=4096, max_height=4096):
+    """根据 IDAT 解压后的数据量推断宽高，不依赖 IHDR 的 CRC
+
+    非隔行扫描时，解压数据量 = 高 x (1 + ceil(宽 x 每像素位数 / 8))，因此只需枚举数据量的因数
+    作为行跨度，再由跨度反推宽度；最后再流式解压一遍，检查每个行首的过滤字节是否为 0~4 来筛掉
+    错误的跨度。复杂度为 O(因数个数) 而不是 O(宽 x 高)。
+    """
+    bpp = CHANNELS[color_type] * bit_depth
+    total = sum(len(block) for block in iter_idat_raw(view, chunks))
+    if total == 0:
+        return []
+
+    candidates = {}
+    for stride in _divisors(total):
+        height = total // stride
+        row_bytes = stride - 1
+        if row_bytes < 1 or height >= max_height:
+            continue
+        # 满足 ceil(宽 x bpp / 8) == row_bytes 的所有宽度，位深小于 8 时可能有多个
+        widths = [w for w in range((row_bytes - 1) * 8 // bpp + 1, row_bytes * 8 // bpp + 1) if w < max_width]
+        if widths:
+            candidates[stride] = [(w, height) for w in widths]
+
+    base = 0
+    for block in iter_idat_raw(view, chunks):
+        if not candidates:
+            break
+        for stride in list(candidates):
+            if block[(-base) % stride::stride].translate(None, FILTER_TYPES):
+                del candidates[stride]
+        base += len(block)
+
+    matches = [dims for stride in candidates for dims in candidates[stride]]
+    matches.sort()
+    return matches
+
+
+def ihdr_crc(ihdr_data, width, height):
+    return binascii.crc32(ihdr_data[:WIDTH_OFFSET] + struct.pack('>II', width, height)
+                          + ihdr_data[HEIGHT_OFFSET + 4:IHDR_CRC_LEN])
+
+
+def rank_by_crc(matches, ihdr_data, target_crc):
+    """把同时满足 CRC 的候选排到最前（原地排序）"""
+    matches.sort(key=lambda dims: ihdr_crc(ihdr_data, *dims) != target_crc)
+
+
+def dimension_patches(ihdr, ihdr_data, target_crc, width, height):
+    """只改写宽高所在的 8 个字节，CRC 对不上时（IDAT 推断的结果）同时改写 IHDR 的 CRC"""
+    patches = [(ihdr.data_offset, struct.pack('>II', width, height))]
+    new_crc = ihdr_crc(ihdr_data, width, height)
+    if new_crc != target_crc:
+        patches.append((ihdr.crc_offset, struct.pack('>I', new_crc)))
+    return patches
+
+
+def is_ambiguous_guess(matches, ihdr_data, target_crc):
+    """IDAT 推断出多组候选且排在最前的一组也对不上 CRC 时，结果只是猜测"""
+    return len(matches) > 1 and ihdr_crc(ihdr_data, *matches[0]) != target_crc
+
+
+def infer_dimensions(view, ihdr_data, target_crc, max_width=4096, max_height=4096):
+    """调用 IDAT 推断并打印候选结果，能同时满足 CRC 的候选排在最前"""
+    bit_depth, color_type, interlace = ihdr_data[12], ihdr_data[13], ihdr_data[16]
+    if color_type not in CHANNELS:
+        print(f"IHDR 中的颜色类型 {color_type} 无效，无法根据 IDAT 推断宽高。")
+        return []
+    if interlace:
+        print("暂不支持根据 IDAT 推断隔行扫描 (Adam7) 图片的宽高。")
+        return []
+    print("CRC 求解失败或已指定 idat 引擎，正在根据 IDAT 解压数据量推断宽高...")
+    try:
+        matches = solve_dimensions_idat(view, list(iter_png_chunks(view)), bit_depth, color_type,
+                                        max_width, max_height)
+    except zlib.error as e:
+        print(f"IDAT 解压失败: {e}")
+        return []
+
+    rank_by_crc(matches, ihdr_data, target_crc)
+    if matches:
+        print(f"根据 IDAT 得到 {len(matches)} 组候选宽高 (行首过滤字节校验通过)。")
+    return matches
+
+
 # 通过指定CRC值来纠正图片的宽高
-def correct_png_dimensions(target_file, target_crc):
+def correct_png_dimensions(target_file, target_crc, engine='crc', max_width=4096, max_height=4096,
+                           workers=None, first_only=False, extra_patches=(), in_place=False, guess=False):
     try:
-        with open(target_file, "rb") as f:
-            crcbp = bytearray(f.read())  # 读取文件内容并存储为可修改的字节数组
-
-        found = False
-        print("正在遍历宽高数据，寻找匹配的 CRC 值...")
-        # 遍历可能的宽度和高度，这里假设范围在 0 到 4095 之间
-        for i in range(4096):
-            for j in range(4096):
-                data = crcbp[12:16] + struct.pack('>i', i) + struct.pack('>i', j) + crcbp[24:29]
-                crc32 = binascii.crc32(data) & 0xffffffff
-                if crc32 == target_crc:
-                    print(f"已找到匹配的宽高: 宽度={i}, 高度={j}")
-                    print(f"十六进制: 宽度={hex(i)}, 高度={hex(j)}")
-                    found = True
-                    break
-            if found:
-                break
+        with open_png(target_file) as mm:
+            ihdr = find_chunk(mm, b'IHDR')
+            if ihdr is None:
+                raise ValueError("未找到 IHDR 块")
+            # 只取出 CRC 覆盖的 "IHDR" + 13 字节数据
+            ihdr_data = bytes(mm[ihdr.offset + 4:ihdr.offset + 4 + IHDR_CRC_LEN])
 
-        if found:
-            # 创建新文件的名称
-            base_name = os.path.basename(target_file)
-            dir_name = os.path.dirname(target_file)
-            new_file_name = os.path.join(dir_name, os.path.splitext(base_name)[0] + "_v2.png")
+            matches = []
+            if engine != 'idat':
+                print(f"正在求解宽高数据 (引擎: {engine}, 范围: {max_width}x{max_height})，寻找匹配的 CRC 值...")
+                matches = search_dimensions(ihdr_data, target_crc, engine, max_width, max_height,
+                                            workers=workers, first_only=first_only)
+            if not matches:
+                # CRC 本身可能被篡改，改为根据 IDAT 数据量推断
+                matches = infer_dimensions(mm, ihdr_data, target_crc, max_width, max_height)
+                if is_ambiguous_guess(matches, ihdr_data, target_crc) and not guess:
+                    # 多种分解都说得通，不替用户挑一组，也不改写 CRC
+                    print("这些候选都无法用 CRC 验证，未写出文件：")
+                    for w, h in matches:
+                        print(f"  宽度={w} ({hex(w)}), 高度={h} ({hex(h)})")
+                    print("确认后可手动修改，或加 --guess 按第一组写出。")
+                    return None
 
-            # 修改图片的宽度和高度
-            modified_crcbp = crcbp[:16] + struct.pack('>i', i) + struct.pack('>i', j) + crcbp[24:]
+        if matches:
+            if len(matches) > 1:
+                print(f"共找到 {len(matches)} 组候选宽高：")
+                for w, h in matches[:MAX_LISTED]:
+                    print(f"  宽度={w} ({hex(w)}), 高度={h} ({hex(h)})")
+                if len(matches) > MAX_LISTED:
+                    print(f"  ... 其余 {len(matches) - MAX_LISTED} 组省略，可缩小 --max-width/--max-height 范围")
+                if len(matches) >= MAX_MATCHES:
+                    print(f"  匹配数已达上限 {MAX_MATCHES}，搜索提前结束")
+            i, j = matches[0]
+            print(f"已找到匹配的宽高: 宽度={i}, 高度={j}")
+            print(f"十六进制: 宽度={hex(i)}, 高度={hex(j)}")
 
-            # 将修改后的内容保存到新文件
-            with open(new_file_name, "wb") as f:
-                f.write(modified_crcbp)
+            patches = dimension_patches(ihdr, ihdr_data, target_crc, i, j)
+            patches.extend(extra_patches)
+            new_file_name = write_patches(target_file, patches, in_place)
             print(f"新图片已保存为: \"{new_file_name}\"")
+            return i, j
         else:
-            print("未找到匹配的宽高。请检查输入的 PNG 文件是否有效。")
+            print("未找到匹配的宽高。请检查输入的 PNG 文件是否有效，或尝试增大 --max-width/--max-height。")
     except FileNotFoundError:
         print(f"Error: 文件 '{target_file}' 未找到，请检查文件路径是否正确。")
-    except ValueError:
-        print(f"Error: 得到的 CRC 值无效，请检查输入。")
+    except ValueError as e:
+        print(f"Error: {e}，请检查输入。")
     except Exception as e:
         print(f"Error: 发生错误 {str(e)}，请确保文件为有效的 PNG 文件。")
+    return None
 
 
-def main():
-    if len(sys.argv) != 2:
-        print("用法: python [脚本] [目标 PNG 文件路径]")
-        print("示例: python png_crc_correct.py image.png")
-        sys.exit(1)
-
-    target_file = sys.argv[1]
-
-    # 获取 CRC 值
-    print(f"正在获取文件 '{target_file}' 的 CRC 值...")
-    crc = calculate_png_crc(target_file)
-    if crc is not None:
-        print(f"获取到的 CRC : {hex(crc)}")
-        # 使用获取到的 CRC 值纠正 PNG 宽高
-        correct_png_dimensions(target_file, crc)
+def check_png_chunks(file_path):
+    """遍历并打印所有数据块的 CRC 校验结果，返回块列表"""
+    with open_png(file_path) as mm:
+        chunks = list(iter_png_chunks(mm))
+        truncated = not chunks or chunks[-1].type != b'IEND'
+    for c in chunks:
+        status = "正确" if c.crc_ok else f"错误 (应为 {hex(c.computed_crc)})"
+        print(f"  [{c.type.decode('latin-1')}] 偏移={c.offset} 长度={c.length} "
+              f"CRC={hex(c.stored_crc)} {status}")
+    if truncated:
+        print("  警告: 未读到 IEND 块，文件可能被截断")
+    return chunks
+
+
+def repair_png_file(file_path, engine='crc', max_width=4096, max_height=4096, fix_crc=False, in_place=False,
+                    guess=False):
+    """不打印任何信息地检查并修复单个文件，返回可写入 JSON 报告的记录"""
+    start = time.perf_counter()
+    record = {'file': file_path, 'status': 'ok', 'original': None, 'recovered': None,
+              'candidates': 0, 'bad_crc_chunks': [], 'truncated': False, 'output': None, 'error': None}
+    try:
+        with open_png(file_path) as mm:
+            chunks = list(iter_png_chunks(mm))
+            ihdr = next((c for c in chunks if c.type == b'IHDR'), None)
+            if ihdr is None:
+                raise ValueError("未找到 IHDR 块")
+            ihdr_data = bytes(mm[ihdr.offset + 4:ihdr.offset + 4 + IHDR_CRC_LEN])
+            record['original'] = list(struct.unpack_from('>II', ihdr_data, WIDTH_OFFSET))
+            record['bad_crc_chunks'] = [c.type.decode('latin-1') for c in chunks if not c.crc_ok]
+            record['truncated'] = chunks[-1].type != b'IEND'
+
+            patches = crc_patches(c for c in chunks if c is not ihdr) if fix_crc else []
+            if not ihdr.crc_ok:
+                matches = []
+                if engine != 'idat':
+                    # 已经在进程池中运行，内部不再开启进程池
+                    matches = search_dimensions(ihdr_data, ihdr.stored_crc, engine, max_width, max_height,
+                                                workers=1)
+                bit_depth, color_type, interlace = ihdr_data[12], ihdr_data[13], ihdr_data[16]
+                if not matches and color_type in CHANNELS and not interlace:
+                    matches = solve_dimensions_idat(mm, chunks, bit_depth, color_type, max_width, max_height)
+                    rank_by_crc(matches, ihdr_data, ihdr.stored_crc)
+                record['candidates'] = len(matches)
+                if is_ambiguous_guess(matches, ihdr_data, ihdr.stored_crc):
+                    # IDAT 有多种说得通的分解，只是猜测；不指定 guess 时不写出任何修改
+                    record['recovered'] = list(matches[0])
+                    record['status'] = 'guessed'
+                    if guess:
+                        patches = dimension_patches(ihdr, ihdr_data, ihdr.stored_crc, *matches[0]) + patches
+                    else:
+                        patches = []
+                elif matches:
+                    record['recovered'] = list(matches[0])
+                    patches = dimension_patches(ihdr, ihdr_data, ihdr.stored_crc, *matches[0]) + patches
+                    record['status'] = 'repaired'
+                else:
+                    record['status'] = 'unsolved'
+        if patches:
+            record['output'] = write_patches(file_path, patches, in_place)
+            if record['status'] == 'ok':
+                record['status'] = 'crc_fixed'
+    except Exception as e:
+        record['status'] = 'error'
+        record['error'] = str(e)
+    record['seconds'] = round(time.perf_counter() - start, 6)
+    return record
+
+
+def _repair_task(task):
+    file_path, options = task
+    return repair_png_file(file_path, **options)
+
+
+def iter_png_paths(target):
+    """目录则递归遍历其中的 PNG，含通配符则按 glob 展开，逐个产出路径而不一次性收集"""
+    if os.path.isdir(target):
+        for root, _, files in os.walk(target):
+            for name in files:
+                # 跳过本工具生成的修复结果
+                if name.lower().endswith('.png') and not name.endswith('_v2.png'):
+                    yield os.path.join(root, name)
     else:
+        for path in glob.iglob(target, recursive=True):
+            # 与目录模式一样跳过修复结果，重复运行同一个通配符不会把 _v2 再修一遍
+            if os.path.isfile(path) and not path.endswith('_v2.png'):
+                yield path
+
+
+def is_batch_target(target):
+    return os.path.isdir(target) or glob.has_magic(target)
+
+
+def batch_repair(target, report_path=None, workers=None, **options):
+    """批量模式：进程池并发检查并修复，每完成一个文件就写出一条 JSONL 记录"""
+    report = open(report_path, 'w', encoding='utf-8') if report_path else None
+    counts = {}
+    try:
+        tasks = ((path, options) for path in iter_png_paths(target))
+        with multiprocessing.Pool(workers or os.cpu_count() or 1) as pool:
+            for record in pool.imap_unordered(_repair_task, tasks, chunksize=4):
+                counts[record['status']] = counts.get(record['status'], 0) + 1
+                if report:
+                    report.write(json.dumps(record, ensure_ascii=False) + '\n')
+                if record['status'] != 'ok':
+                    detail = record['error'] or record['recovered'] or record['bad_crc_chunks']
+                    print(f"[{record['status']}] {record['file']} {detail}")
+    finally:
+        if report:
+            report.close()
+    summary = ", ".join(f"{k}={v}" for k, v in sorted(counts.items()))
+    print(f"批量处理完成: {summary or '没有找到 PNG 文件'}")
+    if report_path:
+        print(f"报告已写入: \"{report_path}\"")
+
+
+def _dimension(value):
+    n = int(value, 0)
+    if not 1 <= n <= 1 << 32:
+        raise argparse.ArgumentTypeError("范围需在 1 到 2^32 之间")
+    return n
+
+
+def main():
+    parser = argparse.ArgumentParser(description="根据 IHDR 的 CRC 值修复 PNG 图片宽高",
+                                     epilog="示例: python pngfix.py image.png")
+    parser.add_argument('target_file', help="目标 PNG 文件路径；传入目录或通配符 (如 'dump/**/*.png') 时进入批量模式")
+    parser.add_argument('--engine', choices=sorted(SOLVERS) + ['idat'], default='crc',
+                        help="求解引擎: crc 为基于 CRC 线性性的快速求解 (默认)，brute 为逐个遍历的参考实现，"
+                             "idat 为根据 IDAT 数据量推断 (IHDR 的 CRC 被篡改时使用，CRC 求解失败时也会自动尝试)")
+    parser.add_argument('--max-width', type=_dimension, default=4096,
+                        help="宽度搜索上限 (不含)，最大 2^32，默认 4096")
+    parser.add_argument('--max-height', type=_dimension, default=4096,
+                        help="高度搜索上限 (不含)，最大 2^32，默认 4096")
+    parser.add_argument('-j', '--workers', type=int, default=None,
+                        help="进程数，默认为 CPU 核心数")
+    parser.add_argument('--first', action='store_true',
+                        help=f"找到第一组匹配即停止所有进程，默认报告范围内的碰撞 (最多 {MAX_MATCHES} 组)")
+    parser.add_argument('--fix-crc', action='store_true',
+                        help="同时修正 IDAT 等其他数据块的错误 CRC")
+    parser.add_argument('--guess', action='store_true',
+                        help="IDAT 推断出多组无法用 CRC 验证的候选时，仍按第一组写出 (默认只列出候选)")
+    parser.add_argument('--in-place', action='store_true',
+                        help="直接改写原文件，默认输出到 *_v2.png")
+    parser.add_argument('--report', metavar='JSONL',
+                        help="批量模式下把每个文件的结果写入 JSONL 报告")
+    args = parser.parse_args()
+
+    target_file = args.target_file
+
+    if is_batch_target(target_file):
+        batch_repair(target_file, report_path=args.report, workers=args.workers, engine=args.engine,
+                     max_width=args.max_width, max_height=args.max_height,
+                     fix_crc=args.fix_crc, in_place=args.in_place, guess=args.guess)
+        return
+
+    print(f"正在检查文件 '{target_file}' 的数据块...")
+    try:
+        chunks = check_png_chunks(target_file)
+    except FileNotFoundError:
+        print(f"Error: 文件 '{target_file}' 未找到，请检查文件路径是否正确。")
+        return
+    except (ValueError, OSError) as e:
+        print(f"Error: {e}，请检查文件是否为有效的 PNG 文件。")
+        return
+
+    ihdr = next((c for c in chunks if c.type == b'IHDR'), None)
+    if ihdr is None:
         print("获取 CRC 值失败，请检查文件是否为有效的 PNG 文件。")
+        return
+    # IHDR 以外的 CRC 错误只在指定 --fix-crc 时修正
+    others = [c for c in chunks if c is not ihdr]
+    extra_patches = crc_patches(others) if args.fix_crc else []
+
+    if ihdr.crc_ok:
+        print("IHDR 的 CRC 与当前宽高一致，无需修复宽高。")
+        if extra_patches:
+            new_file_name = write_patches(target_file, extra_patches, args.in_place)
+            print(f"已修正 {len(extra_patches)} 个数据块的 CRC，保存为: \"{new_file_name}\"")
+        return
+
+    crc = ihdr.stored_crc
+    print(f"获取到的 CRC : {hex(crc)}")
+    # 使用获取到的 CRC 值纠正 PNG 宽高
+    correct_png_dimensions(target_file, crc, engine=args.engine,
+                           max_width=args.max_width, max_height=args.max_height,
+                           workers=args.workers, first_only=args.first,
+                           extra_patches=extra_patches, in_place=args.in_place, guess=args.guess)
 
 
 if __name__ == "__main__":
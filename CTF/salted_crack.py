@@ -1,10 +1,163 @@
+import os
+import sys
+import mmap
+import time
 import base64
+import string
+import hashlib
+import argparse
 import binascii
-import sys
+import multiprocessing
 from getpass import getpass
 from Crypto.Cipher import AES, DES, DES3, ARC4
 from Crypto.Util.Padding import unpad
-# Removed the initial global check for Rabbit support
+
+MASK32 = 0xffffffff
+RABBIT_A = (0x4d34d34d, 0xd34d34d3, 0x34d34d34, 0x4d34d34d, 0xd34d34d3, 0x34d34d34, 0x4d34d34d, 0xd34d34d3)
+
+
+def _rotl32(x, n):
+    return ((x << n) | (x >> (32 - n))) & MASK32
+
+
+class Rabbit:
+    """Rabbit 流密码 (RFC 4503)，字节序与 CryptoJS.Rabbit 一致：key 16 字节，IV 8 字节或省略"""
+
+    block_size = 1
+
+    def __init__(self, key, iv=None):
+        if len(key) != 16:
+            raise ValueError("Rabbit 密钥必须是 16 字节")
+        k = [int.from_bytes(key[i:i + 4], 'little') for i in range(0, 16, 4)]
+        self.x = [
+            k[0], (k[3] << 16 | k[2] >> 16) & MASK32,
+            k[1], (k[0] << 16 | k[3] >> 16) & MASK32,
+            k[2], (k[1] << 16 | k[0] >> 16) & MASK32,
+            k[3], (k[2] << 16 | k[1] >> 16) & MASK32,
+        ]
+        self.c = [
+            _rotl32(k[2], 16), (k[0] & 0xffff0000) | (k[1] & 0xffff),
+            _rotl32(k[3], 16), (k[1] & 0xffff0000) | (k[2] & 0xffff),
+            _rotl32(k[0], 16), (k[2] & 0xffff0000) | (k[3] & 0xffff),
+            _rotl32(k[1], 16), (k[3] & 0xffff0000) | (k[0] & 0xffff),
+        ]
+        self.carry = 0
+        for _ in range(4):
+            self._next_state()
+        for i in range(8):
+            self.c[i] ^= self.x[(i + 4) & 7]
+        if iv is not None:
+            if len(iv) != 8:
+                raise ValueError("Rabbit IV 必须是 8 字节")
+            i0 = int.from_bytes(iv[:4], 'little')
+            i2 = int.from_bytes(iv[4:], 'little')
+            i1 = (i0 >> 16) | (i2 & 0xffff0000)
+            i3 = ((i2 << 16) | (i0 & 0xffff)) & MASK32
+            for i, v in enumerate((i0, i1, i2, i3) * 2):
+                self.c[i] ^= v
+            for _ in range(4):
+                self._next_state()
+        self._buffer = b''
+
+    @classmethod
+    def new(cls, key, iv=None):
+        return cls(key, iv)
+
+    def _next_state(self):
+        c, x = self.c, self.x
+        carry = self.carry
+        for i in range(8):
+            t = c[i] + RABBIT_A[i] + carry
+            carry = t >> 32
+            c[i] = t & MASK32
+        self.carry = carry
+        g = []
+        for i in range(8):
+            u = (x[i] + c[i]) & MASK32
+            sq = u * u
+            g.append((sq ^ (sq >> 32)) & MASK32)
+        x[0] = (g[0] + _rotl32(g[7], 16) + _rotl32(g[6], 16)) & MASK32
+        x[1] = (g[1] + _rotl32(g[0], 8) + g[7]) & MASK32
+        x[2] = (g[2] + _rotl32(g[1], 16) + _rotl32(g[0], 16)) & MASK32
+        x[3] = (g[3] + _rotl32(g[2], 8) + g[1]) & MASK32
+        x[4] = (g[4] + _rotl32(g[3], 16) + _rotl32(g[2], 16)) & MASK32
+        x[5] = (g[5] + _rotl32(g[4], 8) + g[3]) & MASK32
+        x[6] = (g[6] + _rotl32(g[5], 16) + _rotl32(g[4], 16)) & MASK32
+        x[7] = (g[7] + _rotl32(g[6], 8) + g[5]) & MASK32
+
+    def _keystream_block(self):
+        self._next_state()
+        x = self.x
+        s = (
+            x[0] ^ (x[5] >> 16) ^ (x[3] << 16 & MASK32),
+            x[2] ^ (x[7] >> 16) ^ (x[5] << 16 & MASK32),
+            x[4] ^ (x[1] >> 16) ^ (x[7] << 16 & MASK32),
+            x[6] ^ (x[3] >> 16) ^ (x[1] << 16 & MASK32),
+        )
+        return b''.join(w.to_bytes(4, 'little') for w in s)
+
+    def decrypt(self, data):
+        stream = self._buffer
+        while len(stream) < len(data):
+            stream += self._keystream_block()
+        self._buffer = stream[len(data):]
+        return (int.from_bytes(data, 'big') ^ int.from_bytes(stream[:len(data)], 'big')).to_bytes(len(data), 'big')
+
+    encrypt = decrypt
+
+
+class RC4Drop:
+    """CryptoJS.RC4Drop：丢弃密钥流开头 768 字节 (192 个字) 的 RC4"""
+
+    drop = 768
+
+    @classmethod
+    def new(cls, key):
+        return ARC4.new(key, drop=cls.drop)
+
+
+# 算法注册表: (名称, 模块, 模式, 密钥长度, IV 长度, 代价)
+# 模式为 cbc/ecb 时按 PKCS#7 填充检查，ctr/cfb/ofb/stream 没有填充；IV 长度为 0 表示不用 IV。
+# 代价是在本机上测得的单个密钥建表加解密一小段的相对耗时，字典模式按代价从低到高分批尝试。
+# CryptoJS 用口令加密时与 OpenSSL 同为 "Salted__" + EVP_BytesToKey(md5)：
+# AES 默认 AES-256-CBC，TripleDES 为 24 字节密钥，RC4/RC4Drop 为 32 字节密钥，Rabbit 为 16 字节密钥 + 8 字节 IV。
+CIPHERS = [
+    ('RC4', ARC4, 'stream', 16, 0, 1),
+    ('AES-256-CBC', AES, 'cbc', 32, 16, 2),
+    ('AES-192-CBC', AES, 'cbc', 24, 16, 2),
+    ('AES-128-CBC', AES, 'cbc', 16, 16, 2),
+    ('AES-256-ECB', AES, 'ecb', 32, 0, 2),
+    ('AES-192-ECB', AES, 'ecb', 24, 0, 2),
+    ('AES-128-ECB', AES, 'ecb', 16, 0, 2),
+    ('AES-256-CTR', AES, 'ctr', 32, 16, 2),
+    ('AES-192-CTR', AES, 'ctr', 24, 16, 2),
+    ('AES-128-CTR', AES, 'ctr', 16, 16, 2),
+    ('AES-256-CFB', AES, 'cfb', 32, 16, 2),
+    ('AES-192-CFB', AES, 'cfb', 24, 16, 2),
+    ('AES-128-CFB', AES, 'cfb', 16, 16, 2),
+    ('AES-256-OFB', AES, 'ofb', 32, 16, 2),
+    ('AES-192-OFB', AES, 'ofb', 24, 16, 2),
+    ('AES-128-OFB', AES, 'ofb', 16, 16, 2),
+    ('DES-CBC', DES, 'cbc', 8, 8, 2),
+    ('RC4-CryptoJS', ARC4, 'stream', 32, 0, 1),
+    ('RC4Drop-CryptoJS', RC4Drop, 'stream', 32, 0, 2),
+    ('3DES-CBC', DES3, 'cbc', 24, 8, 6),
+    ('3DES-EDE-CBC', DES3, 'cbc', 16, 8, 6),
+    ('Rabbit-CryptoJS', Rabbit, 'stream', 16, 8, 13),
+]
+CIPHER_NAMES = [c[0] for c in CIPHERS]
+# 每个进程一次处理的字典字节数
+WORDLIST_CHUNK_SIZE = 1 << 18
+# 快速检查时只解密开头的字节数（AES 一个分组、DES 两个分组），以及其中可打印字符的最低比例
+# 没有填充可查的流密码/流模式多检查一些字节，降低误报
+QUICK_CHECK_BYTES = 16
+STREAM_CHECK_BYTES = 32
+MIN_PRINTABLE = 0.95
+PRINTABLE_BYTES = string.printable.encode()
+# 所有算法中最长的 key+IV 长度，派生一次即可覆盖
+MAX_KEY_MATERIAL = max(c[3] + c[4] for c in CIPHERS)
+# openssl enc -pbkdf2 不指定 -iter 时的默认迭代次数
+PBKDF2_DEFAULT_ITER = 10000
 
 def decode_base64(s):
     try:
@@ -18,22 +171,51 @@ def decode_base64(s):
 def is_salted(data):
     return data.startswith(b'Salted__')
 
-def evp_bytes_to_key(password, salt, key_len, iv_len):
-    from hashlib import md5
+def derive_key_material(password, salt, length, md='md5', iterations=None):
+    """按 OpenSSL enc 的方式派生 length 字节的 key+IV 材料
+
+    iterations 为 None 时是 EVP_BytesToKey (-md 指定摘要，1.1.0 之前默认 md5，之后默认 sha256)，
+    否则是 -pbkdf2 -iter iterations。两种派生的输出都满足"短的是长的前缀"，
+    所以每个口令只需派生一次最长的长度，再按各算法的密钥/IV 长度切片。
+    """
+    if iterations:
+        return hashlib.pbkdf2_hmac(md, password, salt, iterations, length)
+    digest = getattr(hashlib, md)
     dtot = b''
     d = b''
-    while len(dtot) < (key_len + iv_len):
-        d = md5(d + password + salt).digest()
+    while len(dtot) < length:
+        d = digest(d + password + salt).digest()
         dtot += d
-    return dtot[:key_len], dtot[key_len:key_len+iv_len]
+    return dtot[:length]
+
+
+def split_key(material, key_len, iv_len):
+    return material[:key_len], material[key_len:key_len + iv_len]
 
-def try_decrypt(cipher, ct, key, iv=None):
+
+def evp_bytes_to_key(password, salt, key_len, iv_len, md='md5'):
+    return split_key(derive_key_material(password, salt, key_len + iv_len, md), key_len, iv_len)
+
+def new_cipher(cipher, mode, key, iv):
+    if mode == 'cbc':
+        return cipher.new(key, cipher.MODE_CBC, iv)
+    if mode == 'ecb':
+        return cipher.new(key, cipher.MODE_ECB)
+    if mode == 'ctr':
+        # OpenSSL 把整个 IV 当作 128 位大端计数器
+        return cipher.new(key, cipher.MODE_CTR, nonce=b'', initial_value=iv)
+    if mode == 'cfb':
+        return cipher.new(key, cipher.MODE_CFB, iv, segment_size=cipher.block_size * 8)
+    if mode == 'ofb':
+        return cipher.new(key, cipher.MODE_OFB, iv)
+    return cipher.new(key, iv) if iv else cipher.new(key)
+
+
+def try_decrypt(cipher, mode, ct, key, iv=None):
     try:
-        if iv is not None:
-            instance = cipher.new(key, cipher.MODE_CBC, iv)
-        else:
-            instance = cipher.new(key)
-        pt = instance.decrypt(ct)
+        pt = new_cipher(cipher, mode, key, iv).decrypt(ct)
+        if mode not in ('cbc', 'ecb'):
+            return pt
         try:
             # 尝试 unpad，如果失败，返回原始解密数据
             return unpad(pt, cipher.block_size)
@@ -43,54 +225,231 @@ def try_decrypt(cipher, ct, key, iv=None):
     except Exception as e:
         return f'解密失败: {str(e)}'
 
-def main():
-    print('请输入密文（base64）：', end='')
-    enc = input().strip()
-    password = input('请输入密钥：')
-    password = password.encode()
-    data = decode_base64(enc)
+def printable_ratio(data):
     if not data:
-        print('Base64解码失败')
-        return
-    if not is_salted(data):
-        print('不是以"Salted__"开头的加密数据')
-        return
-    salt = data[8:16]
-    ct = data[16:]
-    print(f'Salt: {salt.hex()}')
-    results = []
-
-    # AES
-    for bits in (32, 24, 16):
-        key, iv = evp_bytes_to_key(password, salt, bits, 16)
-        pt = try_decrypt(AES, ct, key, iv)
-        results.append((f'AES-{bits*8}-CBC', pt))
-
-    # DES
-    key, iv = evp_bytes_to_key(password, salt, 8, 8)
-    pt = try_decrypt(DES, ct, key, iv)
-    results.append(('DES-CBC', pt))
-
-    # 3DES
-    key, iv = evp_bytes_to_key(password, salt, 24, 8)
-    # DES3 key must be 16 or 24 bytes long
-    if len(key) == 16 or len(key) == 24:
-        pt = try_decrypt(DES3, ct, key, iv)
-        results.append(('3DES-CBC', pt))
-    else:
-        results.append(('3DES-CBC', '密钥长度无效 (需要 16 或 24 字节)'))
+        return 0.0
+    # translate 删掉可打印字符后剩下的就是不可打印的，比逐字节判断快得多
+    return 1 - len(data.translate(None, PRINTABLE_BYTES)) / len(data)
+
+
+def _xor(a, b):
+    return (int.from_bytes(a, 'big') ^ int.from_bytes(b, 'big')).to_bytes(len(a), 'big')
+
+
+def _pkcs7_length(block, block_size):
+    n = block[-1]
+    if 1 <= n <= block_size and block[-n:] == bytes((n,)) * n:
+        return n
+    return None
+
+
+def _passes(pt):
+    # 明文只有填充时没有可检查的内容
+    score = printable_ratio(pt) if pt else 1.0
+    return score if score >= MIN_PRINTABLE else None
+
 
+def block_oracle(cipher, key, iv, ct, modes, padding_only=False):
+    """同一把分组密钥只建一个 ECB 对象，由它推出各模式开头的明文并打分，返回 {模式: 得分}，不通过的模式不出现
 
-    # RC4 (ARC4)
-    key, _ = evp_bytes_to_key(password, salt, 16, 0) # RC4 doesn't use IV in this context
+    CBC/ECB：解密开头 QUICK_CHECK_BYTES 字节和最后一个分组，CBC 再与前一个密文分组（或 IV）异或，
+    最后一个分组还要通过 PKCS#7 填充检查；padding_only 为真时只做填充检查，明文可以是二进制。
+    CTR/CFB/OFB：第一个分组的密钥流都是 E(IV)，三者开头明文相同，一次加密就能同时淘汰；
+    之后每个分组的密钥流分别是 E(计数器+i)、E(上一个密文分组)、E(上一个密钥流)，合并成一次 ECB 加密。
+    """
+    scores = {}
+    if not ct:
+        return scores
+    bs = cipher.block_size
+    padded = [mode for mode in modes if mode in ('cbc', 'ecb')] if len(ct) % bs == 0 else []
+    streamed = [mode for mode in modes if mode in ('ctr', 'cfb', 'ofb')]
+    if not padded and not streamed:
+        return scores
     try:
-        pt = ARC4.new(key).decrypt(ct)
-        results.append(('RC4', pt))
-    except Exception as e:
-        results.append(('RC4', f'解密失败: {str(e)}'))
+        ecb = cipher.new(key, cipher.MODE_ECB)
+    except ValueError:
+        # 3DES 密钥退化为单 DES
+        return scores
+
+    if padded:
+        head = ct[:QUICK_CHECK_BYTES]
+        short = len(ct) <= QUICK_CHECK_BYTES
+        raw = ecb.decrypt(head if short else head + ct[-bs:])
+        for mode in padded:
+            pt, last = (raw, raw[-bs:]) if short else (raw[:-bs], raw[-bs:])
+            if mode == 'cbc':
+                pt = _xor(pt, iv + head[:-bs])
+                last = pt[-bs:] if short else _xor(last, ct[-2 * bs:-bs])
+            pad = _pkcs7_length(last, bs)
+            if pad is None:
+                continue
+            pt = pt[:-pad] if short else pt
+            score = printable_ratio(pt) if padding_only else _passes(pt)
+            if score is not None:
+                scores[mode] = score
+
+    if streamed:
+        check = ct[:STREAM_CHECK_BYTES]
+        blocks = [check[i:i + bs] for i in range(0, len(check), bs)]
+        keystream = ecb.encrypt(iv)
+        first = _xor(blocks[0], keystream[:len(blocks[0])])
+        if _passes(first) is None:
+            return scores
+        pts = {mode: first for mode in streamed}
+        streams = {mode: keystream for mode in streamed}
+        counter = int.from_bytes(iv, 'big')
+        for i in range(1, len(blocks)):
+            inputs = []
+            for mode in streamed:
+                if mode == 'ctr':
+                    inputs.append(((counter + i) % (1 << (8 * bs))).to_bytes(bs, 'big'))
+                elif mode == 'cfb':
+                    inputs.append(blocks[i - 1])
+                else:
+                    inputs.append(streams[mode])
+            out = ecb.encrypt(b''.join(inputs))
+            for j, mode in enumerate(streamed):
+                streams[mode] = out[j * bs:(j + 1) * bs]
+                pts[mode] += _xor(blocks[i], streams[mode][:len(blocks[i])])
+        for mode in streamed:
+            score = _passes(pts[mode])
+            if score is not None:
+                scores[mode] = score
+    return scores
+
+
+def oracle(cipher, mode, ct, key, iv):
+    """不解密整段密文，判断密钥是否可能正确；返回开头明文的可打印比例作为得分，不通过返回 None
+
+    分组密码交给 block_oracle；没有填充的流密码只检查开头 STREAM_CHECK_BYTES 字节。
+    """
+    if not ct:
+        return None
+    if mode != 'stream':
+        return block_oracle(cipher, key, iv, ct, (mode,)).get(mode)
+    return _passes(new_cipher(cipher, mode, key, iv).decrypt(ct[:STREAM_CHECK_BYTES]))
+
+
+def group_ciphers(entries):
+    """把同一分组密码、同一密钥长度的各个模式归为一组，每个候选口令每组只建一次 ECB 对象
+
+    返回 [(模块, 模式, key 长度, 组内最长 IV 长度, [(算法名, 模式, IV 长度)])]，流密码各自一组。
+    """
+    groups = {}
+    for name, cipher, mode, key_len, iv_len, _ in entries:
+        group_key = (name,) if mode == 'stream' else (cipher, key_len)
+        group = groups.setdefault(group_key, [cipher, mode, key_len, 0, []])
+        group[3] = max(group[3], iv_len)
+        group[4].append((name, mode, iv_len))
+    return [tuple(group) for group in groups.values()]
+
+
+def check_groups(groups, material, ct, padding_only=False):
+    """对一个口令派生出的密钥材料逐组检查，产出通过的 (得分, 算法名, 模块, 模式, key, iv)"""
+    for cipher, mode, key_len, iv_len, members in groups:
+        key, iv = split_key(material, key_len, iv_len)
+        if mode == 'stream':
+            score = oracle(cipher, mode, ct, key, iv)
+            if score is not None:
+                yield score, members[0][0], cipher, mode, key, iv
+            continue
+        scores = block_oracle(cipher, key, iv, ct, [m for _, m, _ in members], padding_only)
+        for name, member_mode, member_iv_len in members:
+            if member_mode in scores:
+                yield scores[member_mode], name, cipher, member_mode, key, iv[:member_iv_len]
+
+
+def select_ciphers(names=None):
+    return [c for c in CIPHERS if names is None or c[0] in names]
+
+
+def schedule(entries):
+    """按代价从低到高把算法分批：字典模式先用最便宜的一批跑完整个字典，再换下一批"""
+    tiers = {}
+    for entry in entries:
+        tiers.setdefault(entry[5], []).append(entry)
+    return [tiers[cost] for cost in sorted(tiers)]
+
+
+def rank_ciphers(data, password, kdf=('md5', None), ciphers=None, padding_only=False):
+    """对一个口令试所有算法，返回通过 oracle 的 [(得分, 算法名, 模块, 模式, key, iv)]，得分高的在前"""
+    salt, ct = data[8:16], data[16:]
+    material = derive_key_material(password, salt, MAX_KEY_MATERIAL, *kdf)
+    ranked = list(check_groups(group_ciphers(select_ciphers(ciphers)), material, ct, padding_only))
+    ranked.sort(key=lambda item: -item[0])
+    return ranked
+
+
+def iter_wordlist_ranges(path, chunk_size=WORDLIST_CHUNK_SIZE):
+    """把字典文件按换行切成若干 (start, end) 区间，区间内都是完整的行"""
+    with open(path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        start = 0
+        size = len(mm)
+        while start < size:
+            end = mm.find(b'\n', min(start + chunk_size, size))
+            end = size if end == -1 else end + 1
+            yield start, end
+            start = end
+
+
+def _init_cracker(wordlist, salt, ct, tiers, kdf):
+    global _wordlist, _salt, _ct, _tiers, _kdf
+    f = open(wordlist, 'rb')
+    _wordlist = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    _salt, _ct, _kdf = salt, ct, kdf
+    _tiers = [group_ciphers(select_ciphers(names)) for names in tiers]
+
+
+def _crack_range(task):
+    """在 [start, end) 范围内的每个口令上试第 tier 批算法，返回 (尝试的口令数, [(口令, 算法名)])"""
+    start, end, tier = task
+    groups = _tiers[tier]
+    material_len = max(key_len + iv_len for _, _, key_len, iv_len, _ in groups)
+    hits = []
+    chunk = _wordlist[start:end]
+    words = (chunk[:-1] if chunk.endswith(b'\n') else chunk).split(b'\n')
+    for password in words:
+        password = password.rstrip(b'\r')
+        material = derive_key_material(password, _salt, material_len, *_kdf)
+        hits.extend((password, name) for _, name, _, _, _, _ in check_groups(groups, material, _ct))
+    return len(words), hits
 
 
+def crack(data, wordlist, ciphers=None, workers=None, find_all=False, kdf=('md5', None)):
+    """字典攻击，返回 [(口令, 算法名)]；进度与速率写到 stderr
 
+    kdf 为 (摘要算法, PBKDF2 迭代次数)，迭代次数为 None 表示 EVP_BytesToKey。
+    算法按 schedule() 分批，便宜的一批跑完整个字典仍未命中才换下一批。
+    """
+    salt, ct = data[8:16], data[16:]
+    tiers = [[c[0] for c in tier] for tier in schedule(select_ciphers(ciphers))]
+    hits = []
+    with multiprocessing.Pool(workers or os.cpu_count() or 1, initializer=_init_cracker,
+                              initargs=(wordlist, salt, ct, tiers, kdf)) as pool:
+        for index, names in enumerate(tiers):
+            print(f'第 {index + 1}/{len(tiers)} 批: {", ".join(names)}', file=sys.stderr)
+            tried = 0
+            start = last = time.perf_counter()
+            tasks = ((begin, end, index) for begin, end in iter_wordlist_ranges(wordlist))
+            for count, found in pool.imap_unordered(_crack_range, tasks):
+                tried += count
+                hits.extend(found)
+                now = time.perf_counter()
+                if now - last >= 0.5:
+                    last = now
+                    print(f'\r已尝试 {tried} 个口令，{tried / (now - start):,.0f} 个/秒', end='', file=sys.stderr)
+                if hits and not find_all:
+                    pool.terminate()
+                    break
+            elapsed = time.perf_counter() - start
+            print(f'\r已尝试 {tried} 个口令，用时 {elapsed:.1f} 秒，{tried / max(elapsed, 1e-9):,.0f} 个/秒',
+                  file=sys.stderr)
+            if hits and not find_all:
+                break
+    return hits
+
+
+def print_results(results):
     print('\n所有解密尝试结果：')
     # 动态计算列宽
     mode_width = 0
@@ -109,5 +468,64 @@ def main():
             # 如果不是bytes，说明是错误信息或者跳过信息
             print(pt)
 
+
+def decrypt_ranked(data, password, kdf=('md5', None), ciphers=None, padding_only=False):
+    """先用 oracle 筛掉错误的算法，只对通过的组合做完整解密，返回 [(名称, 明文)]，最可能的在前
+
+    padding_only 为真时 CBC/ECB 只要求填充正确，图片等二进制明文也会列出 (以十六进制显示)。
+    """
+    print(f'Salt: {data[8:16].hex()}')
+    return [(f'{name} ({score:.0%} 可打印)', try_decrypt(cipher, mode, data[16:], key, iv))
+            for score, name, cipher, mode, key, iv in rank_ciphers(data, password, kdf, ciphers, padding_only)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description='OpenSSL "Salted__" 密文解密；指定 -w 时做字典攻击')
+    parser.add_argument('-c', '--ciphertext', help='Base64 密文，不指定时交互输入')
+    parser.add_argument('-w', '--wordlist', help='字典文件，每行一个口令')
+    parser.add_argument('--cipher', action='append', choices=CIPHER_NAMES,
+                        help='只尝试指定算法，可多次指定，默认全部')
+    parser.add_argument('-j', '--workers', type=int, help='进程数，默认 CPU 核数')
+    parser.add_argument('--all', action='store_true', help='跑完整个字典，列出所有候选而不是找到第一个就停')
+    parser.add_argument('--md', choices=['md5', 'sha1', 'sha256', 'sha512'],
+                        help='密钥派生的摘要算法，对应 openssl enc -md；默认 EVP_BytesToKey 用 md5 (CryptoJS)，'
+                             'PBKDF2 用 sha256 (与 openssl enc -pbkdf2 一致)')
+    parser.add_argument('--pbkdf2', action='store_true', help='使用 PBKDF2 派生密钥，对应 openssl enc -pbkdf2')
+    parser.add_argument('--iter', type=int, help=f'PBKDF2 迭代次数，指定时隐含 --pbkdf2，默认 {PBKDF2_DEFAULT_ITER}')
+    args = parser.parse_args()
+    iterations = args.iter or (PBKDF2_DEFAULT_ITER if args.pbkdf2 else None)
+    kdf = (args.md or ('md5' if iterations is None else 'sha256'), iterations)
+
+    if args.ciphertext:
+        enc = args.ciphertext.strip()
+    else:
+        print('请输入密文（base64）：', end='')
+        enc = input().strip()
+    data = decode_base64(enc)
+    if not data:
+        print('Base64解码失败')
+        return
+    if not is_salted(data):
+        print('不是以"Salted__"开头的加密数据')
+        return
+
+    if args.wordlist:
+        hits = crack(data, args.wordlist, args.cipher, args.workers, args.all, kdf)
+        if not hits:
+            print('字典中没有找到可能的口令')
+        for password, name in hits:
+            print(f'\n候选口令: {password.decode("utf-8", errors="replace")} ({name})')
+            print_results(decrypt_ranked(data, password, kdf, [name]))
+        return
+
+    password = input('请输入密钥：')
+    password = password.encode()
+    # 口令已知时明文可能是二进制文件，分组模式只看填充，不要求可打印
+    results = decrypt_ranked(data, password, kdf, args.cipher, padding_only=True)
+    if not results:
+        print('所有算法的填充或开头明文检查都未通过，密钥或派生参数可能不对')
+        return
+    print_results(results)
+
 if __name__ == '__main__':
-    main()
\ No newline at end of file
+    main()
@@ -1,34 +1,616 @@
 # -*- coding:utf-8 -*-
 #Author: mochu7
+import os
+import csv
 import sys
+import glob
+import json
+import math
+import mmap
+import time
+import array
+import heapq
+import random
+import itertools
+import codecs
+import string
+import hashlib
+import argparse
+import multiprocessing
+from collections import Counter
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
 
 alphabet = "abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ1234567890!@#$%^&*()_+- =\\{\\}[]"
 
-# 检查命令行参数是否足够
-if len(sys.argv) < 2:
-    print("请在命令行中提供文件路径，格式为：python 脚本名.py 文件名")
-    sys.exit(1)
+# 每次处理的字节数，内存占用只与它有关，与文件大小无关
+CHUNK_SIZE = 16 << 20
+MAX_ORDER = 3
 
-# 获取命令行传入的文件路径
-file_path = sys.argv[1]
+# 替换密码求解：英文字母按频率从高到低，用作初始密钥
+ENGLISH_ORDER = "etaoinshrdlcumwfgypbvkjxqz"
+# 四字母组对数概率表：4 字节魔数 + 26^4 个小端 float32 (log10 概率)，按 a..z 四位 26 进制编号
+QUADGRAM_MAGIC = b'QG26'
+QUADGRAM_COUNT = 26 ** 4
+QUADGRAM_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'english_quadgrams.bin')
+QUADGRAM_WEIGHTS = (26 ** 3, 26 ** 2, 26, 1)
+SOLVE_RESTARTS = 20
+# 多文件模式下 n-gram 用 Count-Min sketch 时的默认列数与行数
+CMS_WIDTH = 1 << 16
+CMS_DEPTH = 4
+# 按字节的 n-gram 用乘法-移位哈希，整数编码可以在 numpy 里整批计算下标；每行一对 64 位常数
+CMS_HASH_SEEDS = ((0x9E3779B97F4A7C15, 0x632BE59BD9B4E019), (0xC2B2AE3D27D4EB4F, 0x165667B19E3779F9),
+                  (0xD6E8FEB86659FD93, 0x27D4EB2F165667C5), (0xFF51AFD7ED558CCD, 0xC4CEB9FE1A85EC53))
+MASK64 = (1 << 64) - 1
+# 按字节统计时不超过该阶的 n-gram 用 2^(8n) 项的定长数组计数，更高阶用稀疏的 (编码, 计数) 数组
+DENSE_MAX_ORDER = 2
+# sketch 模式每块的大小，块内去重计数的临时数组只与它有关
+SKETCH_CHUNK_SIZE = 1 << 20
+LETTERS = string.ascii_lowercase.encode()
+NON_LETTERS = bytes(b for b in range(256) if b not in LETTERS)
 
-try:
-    # 打开文件并读取内容
-    strings = open(file_path).read()
-except FileNotFoundError:
-    print(f"未找到文件：{file_path}")
-    sys.exit(1)
-
-result = {}
-for i in alphabet:
-    counts = strings.count(i)
-    i = '{0}'.format(i)
-    result[i] = counts
-
-res = sorted(result.items(), key=lambda item: item[1], reverse=True)
-for data in res:
-    print(data)
-
-for i in res:
-    flag = str(i[0])
-    print(flag[0], end="")
\ No newline at end of file
+
+def iter_chunks(path, chunk_size=CHUNK_SIZE):
+    """按块读取文件内容；普通文件用 mmap 顺序切片，'-' 表示标准输入"""
+    if path == '-':
+        while True:
+            chunk = sys.stdin.buffer.read(chunk_size)
+            if not chunk:
+                return
+            yield chunk
+    with open(path, 'rb') as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            for start in range(0, len(mm), chunk_size):
+                yield mm[start:start + chunk_size]
+
+
+def count_ngrams(path, order=1, text=False, encoding='utf-8', chunk_size=CHUNK_SIZE):
+    """单次顺序读取统计 1..order 阶 n-gram，返回 [Counter]，第 n-1 个是 n-gram 的计数
+
+    默认按字节统计 (键为 bytes)，text=True 时按 encoding 增量解码后按字符统计 (键为 str)。
+    相邻两块之间保留上一块末尾 order-1 个元素，每块只统计结尾落在本块内的 n-gram，跨块的不会丢失或重复。
+    """
+    if not text and np is not None:
+        return _count_bytes_numpy(path, order, chunk_size)
+    counts = [Counter() for _ in range(order)]
+    for chunk_counts in iter_chunk_ngrams(path, order, text, encoding, chunk_size):
+        for counter, chunk_counter in zip(counts, chunk_counts):
+            counter.update(chunk_counter)
+    return counts
+
+
+def iter_chunk_ngrams(path, order=1, text=False, encoding='utf-8', chunk_size=CHUNK_SIZE):
+    """逐块产出本块内结尾的 1..order 阶 n-gram 计数，规则与 count_ngrams 相同，内存只与块大小有关
+
+    一般每阶是一个 Counter；按字节统计且有 numpy 时 2 阶及以上为 np.unique 得到的 (大端整数编码, 计数) 数组对，
+    不会像 _count_bytes_numpy 那样分配 2^(8n) 的定长数组，也不为每个 n-gram 建 Python 对象。
+    """
+    decoder = codecs.getincrementaldecoder(encoding)(errors='replace') if text else None
+    join = ''.join if text else bytes
+    tail = '' if text else b''
+    sparse = not text and np is not None
+    if sparse:
+        tail = np.zeros(0, dtype=np.uint32)
+    chunks = iter_chunks(path, chunk_size)
+    if text:
+        chunks = itertools.chain((decoder.decode(chunk) for chunk in chunks), [decoder.decode(b'', final=True)])
+    for chunk in chunks:
+        counts = [Counter() for _ in range(order)]
+        if sparse:
+            a = np.frombuffer(chunk, dtype=np.uint8)
+            hist = np.bincount(a, minlength=256)
+            counts[0] = Counter({bytes((b,)): int(hist[b]) for b in np.flatnonzero(hist)})
+            joined = np.concatenate((tail, a.astype(np.uint32)))
+            for n in range(2, order + 1):
+                seq = joined[max(0, len(tail) - n + 1):]
+                if len(seq) < n:
+                    continue
+                codes = seq[:len(seq) - n + 1].copy()
+                for i in range(1, n):
+                    codes <<= 8
+                    codes |= seq[i:len(seq) - n + 1 + i]
+                counts[n - 1] = np.unique(codes, return_counts=True)
+        else:
+            if text:
+                counts[0].update(chunk)
+            else:
+                for b, c in Counter(chunk).items():
+                    counts[0][bytes((b,))] += c
+            joined = tail + chunk
+            for n in range(2, order + 1):
+                seq = joined[max(0, len(tail) - n + 1):]
+                counts[n - 1].update(map(join, zip(*(seq[i:] for i in range(n)))))
+        tail = joined[len(joined) - order + 1:] if order > 1 else tail
+        yield counts
+
+
+def sketch_ngrams(path, order, text=False, encoding='utf-8', top=20, sketch_width=CMS_WIDTH,
+                  chunk_size=SKETCH_CHUNK_SIZE):
+    """sketch 模式的单文件统计：1-gram 精确计数，n-gram 逐块写进 Count-Min sketch
+
+    每块结束后把已有候选和本块前 top 个 n-gram 放在一起，按 sketch 估计值只留前 top 个，
+    所以内存只有 sketch、一块数据和 top 个候选，与文件大小和 n 无关。返回 ([Counter], [sketch])。
+    """
+    unigrams = Counter()
+    sketches = [None] + [CountMinSketch(sketch_width) for _ in range(1, order)]
+    heavy = [None] + [Counter() for _ in range(1, order)]
+    for chunk_counts in iter_chunk_ngrams(path, order, text, encoding, chunk_size):
+        unigrams.update(chunk_counts[0])
+        for n in range(1, order):
+            grams = chunk_counts[n]
+            if isinstance(grams, tuple):
+                codes, values = grams
+                sketches[n].update_codes(codes, values)
+                best = np.argsort(values)[-top:] if top else []
+                chunk_top = (int(codes[i]).to_bytes(n + 1, 'big') for i in best)
+            else:
+                sketches[n].update(grams)
+                chunk_top = (gram for gram, _ in grams.most_common(top))
+            candidates = set(heavy[n]).union(chunk_top)
+            estimates = ((gram, sketches[n].estimate(gram)) for gram in candidates)
+            heavy[n] = Counter(dict(heapq.nlargest(top, estimates, key=lambda item: item[1])))
+    return [unigrams] + heavy[1:], sketches
+
+
+def _merge_sparse(keys, counts, new_keys, new_counts):
+    """合并两组 (有序整数编码, 计数)，结果仍按编码排序"""
+    merged, inverse = np.unique(np.concatenate((keys, new_keys)), return_inverse=True)
+    weights = np.concatenate((counts, new_counts))
+    return merged, np.bincount(inverse.ravel(), weights=weights, minlength=len(merged)).astype(np.int64)
+
+
+def _count_bytes_numpy(path, order, chunk_size):
+    """按字节统计的 numpy 实现：n-gram 编码成 8n 位整数后计数
+
+    DENSE_MAX_ORDER 阶以内 bincount 累加在定长数组里；更高阶的定长数组有 2^24 项 (128 MiB)，
+    改为每块 np.unique 后与已有的 (编码, 计数) 合并，内存只与实际出现的 n-gram 种数有关。
+    """
+    hists = [np.zeros(1 << (8 * n), dtype=np.int64) if n <= DENSE_MAX_ORDER
+             else (np.zeros(0, dtype=np.uint32), np.zeros(0, dtype=np.int64))
+             for n in range(1, order + 1)]
+    tail = np.zeros(0, dtype=np.uint32)
+    for chunk in iter_chunks(path, chunk_size):
+        a = np.frombuffer(chunk, dtype=np.uint8)
+        hists[0] += np.bincount(a, minlength=256)
+        joined = np.concatenate((tail, a.astype(np.uint32)))
+        for n in range(2, order + 1):
+            seq = joined[max(0, len(tail) - n + 1):]
+            if len(seq) < n:
+                continue
+            codes = seq[:len(seq) - n + 1].copy()
+            for i in range(1, n):
+                codes <<= 8
+                codes |= seq[i:len(seq) - n + 1 + i]
+            if n <= DENSE_MAX_ORDER:
+                hists[n - 1] += np.bincount(codes, minlength=1 << (8 * n))
+            else:
+                hists[n - 1] = _merge_sparse(*hists[n - 1], *np.unique(codes, return_counts=True))
+        tail = joined[len(joined) - order + 1:] if order > 1 else tail
+    counts = []
+    for n, hist in enumerate(hists, 1):
+        if n <= DENSE_MAX_ORDER:
+            keys = np.flatnonzero(hist)
+            values = hist[keys]
+        else:
+            keys, values = hist
+        counts.append(Counter({int(k).to_bytes(n, 'big'): int(v) for k, v in zip(keys, values)}))
+    return counts
+
+
+def as_text(gram):
+    return gram if isinstance(gram, str) else gram.decode('latin-1')
+
+
+def alphabet_table(unigrams, text=False):
+    """原脚本的输出：alphabet 中每个字符的出现次数，按次数降序"""
+    result = {}
+    for i in alphabet:
+        result[i] = unigrams.get(i if text else i.encode(), 0)
+    return sorted(result.items(), key=lambda item: item[1], reverse=True)
+
+
+class CountMinSketch:
+    """可合并的 Count-Min sketch：depth 行 × width 列计数器，内存固定，估计值只会偏大
+
+    行下标与进程无关，所以各个进程各自建的 sketch 可以直接逐格相加合并：
+    字节串键按大端整数做乘法-移位哈希 (可由 update_codes 在 numpy 中整批计算)，字符串键切分 blake2b 摘要。
+    """
+
+    def __init__(self, width=CMS_WIDTH, depth=CMS_DEPTH):
+        if depth > len(CMS_HASH_SEEDS):
+            raise ValueError(f"depth 最大为 {len(CMS_HASH_SEEDS)}")
+        self.width, self.depth = width, depth
+        if np is not None:
+            self.table = np.zeros((depth, width), dtype=np.int64)
+        else:
+            self.table = [[0] * width for _ in range(depth)]
+
+    def _indexes(self, key):
+        if isinstance(key, bytes):
+            code = int.from_bytes(key, 'big')
+            return [(((code * a + b) & MASK64) >> 32) % self.width for a, b in CMS_HASH_SEEDS[:self.depth]]
+        key = key.encode('utf-8')
+        digest = hashlib.blake2b(key, digest_size=4 * self.depth).digest()
+        return [int.from_bytes(digest[4 * i:4 * i + 4], 'little') % self.width for i in range(self.depth)]
+
+    def update(self, counter):
+        if np is not None and counter:
+            # 先算出所有下标，再每行一次 np.add.at 累加
+            cols = np.array([self._indexes(key) for key in counter], dtype=np.int64)
+            values = np.fromiter(counter.values(), dtype=np.int64, count=len(counter))
+            for row in range(self.depth):
+                np.add.at(self.table[row], cols[:, row], values)
+            return
+        for key, count in counter.items():
+            for row, col in enumerate(self._indexes(key)):
+                self.table[row][col] += count
+
+    def update_codes(self, codes, values):
+        """按字节 n-gram 的整数编码批量累加，下标与 _indexes 对同一 n-gram 的 bytes 算出的一致"""
+        codes = codes.astype(np.uint64)
+        for row, (a, b) in enumerate(CMS_HASH_SEEDS[:self.depth]):
+            # uint64 乘加自然按 2^64 回绕，与 _indexes 里的 & MASK64 相同
+            cols = ((codes * np.uint64(a) + np.uint64(b)) >> np.uint64(32)) % np.uint64(self.width)
+            self.table[row] += np.bincount(cols, weights=values, minlength=self.width).astype(np.int64)
+
+    def estimate(self, key):
+        return int(min(self.table[row][col] for row, col in enumerate(self._indexes(key))))
+
+    def merge(self, other):
+        if (self.width, self.depth) != (other.width, other.depth):
+            raise ValueError("只能合并尺寸相同的 sketch")
+        if np is not None:
+            self.table += other.table
+        else:
+            for row, other_row in zip(self.table, other.table):
+                for col, value in enumerate(other_row):
+                    row[col] += value
+        return self
+
+
+def iter_paths(target):
+    """目录递归列出所有文件，带通配符时按 glob 展开 (支持 **)，否则就是这一个文件"""
+    if os.path.isdir(target):
+        for root, _, files in os.walk(target):
+            for name in sorted(files):
+                yield os.path.join(root, name)
+    elif glob.has_magic(target):
+        for path in sorted(glob.glob(target, recursive=True)):
+            if os.path.isfile(path):
+                yield path
+    else:
+        yield target
+
+
+def _count_task(task):
+    path, order, text, encoding, top, sketch_width = task
+    record = {'path': path, 'counts': None, 'sketches': None, 'error': None}
+    try:
+        if sketch_width:
+            # n-gram 直接逐块写进 sketch，只回传 sketch 和本文件的前 top 个候选，进程内存与结果大小都与文件内容无关
+            counts, record['sketches'] = sketch_ngrams(path, order, text, encoding, top, sketch_width)
+        else:
+            counts = count_ngrams(path, order, text, encoding)
+    except (OSError, ValueError) as e:
+        record['error'] = str(e)
+        return record
+    record['counts'] = counts
+    return record
+
+
+def aggregate_files(paths, order=1, text=False, encoding='utf-8', top=20, sketch_width=None, workers=None):
+    """进程池并发统计多个文件，返回 (按路径排序的各文件记录, 合并后的 [Counter])
+
+    Counter 相加满足结合律，完成顺序不影响结果。使用 sketch 时合并后的 n-gram 表
+    由各文件的候选在合并 sketch 上的估计值组成。
+    """
+    records = []
+    total = [Counter() for _ in range(order)]
+    sketches = [None] * order
+    candidates = [set() for _ in range(order)]
+    tasks = ((path, order, text, encoding, top, sketch_width) for path in paths)
+    with multiprocessing.Pool(workers or os.cpu_count() or 1) as pool:
+        for record in pool.imap_unordered(_count_task, tasks):
+            records.append(record)
+            if record['error']:
+                continue
+            total[0].update(record['counts'][0])
+            for n in range(1, order):
+                if record['sketches']:
+                    sketch = record['sketches'][n]
+                    sketches[n] = sketch if sketches[n] is None else sketches[n].merge(sketch)
+                    candidates[n].update(record['counts'][n])
+                else:
+                    total[n].update(record['counts'][n])
+            # 合并后不再需要各文件的 sketch，及早释放
+            record['sketches'] = None
+    for n in range(1, order):
+        if sketches[n] is not None:
+            total[n] = Counter({gram: sketches[n].estimate(gram) for gram in candidates[n]})
+    records.sort(key=lambda r: r['path'])
+    return records, total
+
+
+def _table_rows(counts, top):
+    for n, counter in enumerate(counts, 1):
+        items = counter.most_common() if n == 1 else counter.most_common(top)
+        for gram, count in items:
+            yield n, as_text(gram), count
+
+
+def export_tables(records, total, output, fmt, top=20):
+    """把各文件及合计的频率表写成 CSV (file,n,gram,count，合计的 file 为 *) 或 JSON"""
+    with open(output, 'w', encoding='utf-8', newline='') as f:
+        if fmt == 'csv':
+            writer = csv.writer(f)
+            writer.writerow(['file', 'n', 'gram', 'count'])
+            for record in records:
+                if record['counts'] is not None:
+                    writer.writerows((record['path'],) + row for row in _table_rows(record['counts'], top))
+            writer.writerows(('*',) + row for row in _table_rows(total, top))
+            return
+
+        def as_json(counts):
+            tables = {}
+            for n, gram, count in _table_rows(counts, top):
+                tables.setdefault(str(n), {})[gram] = count
+            return tables
+
+        json.dump({
+            'files': {r['path']: as_json(r['counts']) if r['counts'] is not None else {'error': r['error']}
+                      for r in records},
+            'total': as_json(total),
+        }, f, ensure_ascii=False, indent=1)
+
+
+def build_quadgrams(corpus, output=QUADGRAM_FILE, chunk_size=CHUNK_SIZE):
+    """从英文语料统计四字母组 (忽略大小写和非字母字符)，写成 load_quadgrams 读取的紧凑数组文件"""
+    counts = [0] * QUADGRAM_COUNT
+    tail = b''
+    for chunk in iter_chunks(corpus, chunk_size):
+        letters = tail + chunk.lower().translate(None, NON_LETTERS)
+        if np is not None:
+            a = np.frombuffer(letters, dtype=np.uint8).astype(np.int64) - ord('a')
+            if len(a) >= 4:
+                codes = a[:-3] * 17576 + a[1:-2] * 676 + a[2:-1] * 26 + a[3:]
+                for code, c in zip(*np.unique(codes, return_counts=True)):
+                    counts[code] += int(c)
+        else:
+            for i in range(len(letters) - 3):
+                w, x, y, z = letters[i:i + 4]
+                counts[(w - 97) * 17576 + (x - 97) * 676 + (y - 97) * 26 + (z - 97)] += 1
+        tail = letters[-3:]
+    total = sum(counts)
+    if not total:
+        raise ValueError("语料中没有足够的英文字母")
+    # 未出现的四字母组给一个比出现一次更低的下限
+    floor = math.log10(0.01 / total)
+    table = array.array('f', (math.log10(c / total) if c else floor for c in counts))
+    if sys.byteorder != 'little':
+        table.byteswap()
+    with open(output, 'wb') as f:
+        f.write(QUADGRAM_MAGIC)
+        table.tofile(f)
+    return total
+
+
+def load_quadgrams(path=QUADGRAM_FILE):
+    """mmap 载入四字母组表，有 numpy 时返回 float32 数组视图，否则返回 memoryview"""
+    with open(path, 'rb') as f:
+        if os.fstat(f.fileno()).st_size != 4 + 4 * QUADGRAM_COUNT:
+            raise ValueError(f"{path} 不是四字母组表文件")
+        mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    if mm[:4] != QUADGRAM_MAGIC or len(mm) != 4 + 4 * QUADGRAM_COUNT:
+        raise ValueError(f"{path} 不是四字母组表文件")
+    if np is not None:
+        return np.frombuffer(mm, dtype='<f4', offset=4)
+    return memoryview(mm)[4:].cast('f')
+
+
+def initial_key(letters):
+    """按频率给出初始密钥：出现最多的密文字母对应 e，其次对应 t ……"""
+    freq = Counter(letters)
+    order = sorted(range(26), key=lambda c: -freq[c])
+    key = [0] * 26
+    for cipher, plain in zip(order, ENGLISH_ORDER):
+        key[cipher] = ord(plain) - ord('a')
+    return key
+
+
+class SubstitutionSolver:
+    """单表替换密码的四字母组爬山求解
+
+    key[c] 为密文字母 c 对应的明文字母 (0..25)。交换两个密文字母的映射只会影响包含这两个字母的
+    四字母组，所以预先按字母对收集受影响的密文四字母组 (相同的合并计数)，每次交换只重新计算这些。
+    """
+
+    def __init__(self, ciphertext, table):
+        self.table = table
+        data = ciphertext.lower().encode('ascii', 'ignore').translate(None, NON_LETTERS)
+        self.letters = [b - ord('a') for b in data]
+        quads = Counter(tuple(self.letters[i:i + 4]) for i in range(len(self.letters) - 3))
+        by_letter = [set() for _ in range(26)]
+        for quad in quads:
+            for c in quad:
+                by_letter[c].add(quad)
+        # 每对字母受影响的四字母组 (并集) 及其出现次数
+        self.pair_quads = {}
+        for a in range(26):
+            for b in range(a + 1, 26):
+                if by_letter[a] and by_letter[b]:
+                    affected = list(by_letter[a] | by_letter[b])
+                    self.pair_quads[a, b] = (affected, [quads[q] for q in affected])
+        self.quads = (list(quads), list(quads.values()))
+        if np is not None:
+            self.weights = np.array(QUADGRAM_WEIGHTS, dtype=np.int64)
+            self.pair_quads = {pair: (np.array(q, dtype=np.int64), np.array(c, dtype=np.float64))
+                               for pair, (q, c) in self.pair_quads.items()}
+
+    def score(self, key):
+        return self._quads_score(key, *self.quads)
+
+    def _quads_score(self, key, quads, counts):
+        table = self.table
+        total = 0.0
+        for (w, x, y, z), c in zip(quads, counts):
+            total += c * table[key[w] * 17576 + key[x] * 676 + key[y] * 26 + key[z]]
+        return total
+
+    def _swap_delta(self, key, a, b, quads, counts):
+        if np is not None:
+            plain = np.array(key, dtype=np.int64)
+            old = self.table[plain[quads] @ self.weights]
+            plain[a], plain[b] = plain[b], plain[a]
+            new = self.table[plain[quads] @ self.weights]
+            return float((new - old) @ counts)
+        old = self._quads_score(key, quads, counts)
+        key[a], key[b] = key[b], key[a]
+        new = self._quads_score(key, quads, counts)
+        key[a], key[b] = key[b], key[a]
+        return new - old
+
+    def climb(self, key):
+        """不断交换两个密文字母的映射，只要得分变高就接受，直到没有可改进的交换"""
+        key = list(key)
+        improved = True
+        while improved:
+            improved = False
+            for (a, b), (quads, counts) in self.pair_quads.items():
+                if self._swap_delta(key, a, b, quads, counts) > 1e-6:
+                    key[a], key[b] = key[b], key[a]
+                    improved = True
+        return key
+
+    def solve(self, restarts=SOLVE_RESTARTS, seed=None):
+        """从频率密钥出发爬山，再从当前最优解随机打乱几对后重新爬山，返回 (得分, 密钥)"""
+        rng = random.Random(seed)
+        best = self.climb(initial_key(self.letters))
+        best_score = self.score(best)
+        for _ in range(restarts):
+            key = list(best)
+            for _ in range(rng.randint(2, 6)):
+                a, b = rng.sample(range(26), 2)
+                key[a], key[b] = key[b], key[a]
+            key = self.climb(key)
+            key_score = self.score(key)
+            if key_score > best_score + 1e-6:
+                best, best_score = key, key_score
+        return best_score, best
+
+
+def apply_key(text, key):
+    """用密钥解密，保留大小写和非字母字符"""
+    lower = string.ascii_lowercase
+    plain = ''.join(lower[key[i]] for i in range(26))
+    return text.translate(str.maketrans(lower + lower.upper(), plain + plain.upper()))
+
+
+def print_quadgram_hint(path):
+    print("先用任意英文语料 (如几 MB 的英文小说) 生成：")
+    print(f"python {os.path.basename(__file__)} 语料.txt --build-quadgrams -q {path}")
+
+
+def solve_main(args):
+    # 四字母组表不随脚本发布，缺失、为空或格式不对时都提示先用 --build-quadgrams 生成
+    try:
+        table = load_quadgrams(args.quadgrams)
+    except FileNotFoundError:
+        print(f"--solve 需要四字母组表，未找到 {args.quadgrams}")
+        print_quadgram_hint(args.quadgrams)
+        sys.exit(1)
+    except (OSError, ValueError) as e:
+        print(f"无法载入四字母组表 {args.quadgrams}：{e}")
+        print_quadgram_hint(args.quadgrams)
+        sys.exit(1)
+    if args.file == '-':
+        text = sys.stdin.read()
+    else:
+        with open(args.file, encoding=args.encoding, errors='replace') as f:
+            text = f.read()
+    start = time.perf_counter()
+    solver = SubstitutionSolver(text, table)
+    if len(solver.letters) < 4:
+        print("密文中的英文字母太少，无法求解")
+        return
+    score, key = solver.solve(args.restarts)
+    print(f"得分 {score:.1f}，用时 {time.perf_counter() - start:.2f} 秒")
+    print("密文: " + string.ascii_lowercase)
+    print("明文: " + ''.join(string.ascii_lowercase[k] for k in key))
+    print()
+    print(apply_key(text, key))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="字频统计：单次顺序读取，统计字符及 2/3-gram 频率")
+    parser.add_argument('file', help="文件路径，'-' 表示标准输入；给目录或通配符 (如 'out/**/*.txt') 时汇总多个文件")
+    parser.add_argument('-n', '--order', type=int, default=1, choices=range(1, MAX_ORDER + 1),
+                        help="同时统计到几阶 n-gram，默认 1")
+    parser.add_argument('--text', action='store_true', help="按 Unicode 字符统计 (默认按字节)")
+    parser.add_argument('--encoding', default='utf-8', help="--text 时的文件编码，默认 utf-8")
+    parser.add_argument('--top', type=int, default=20, help="n-gram 表显示的条数")
+    parser.add_argument('--all', action='store_true', help="列出文件中出现的所有字符，而不只是 alphabet 中的")
+    parser.add_argument('--solve', action='store_true', help="把文件当作单表替换密文，用字频 + 四字母组爬山求解 (需先用 --build-quadgrams 生成四字母组表)")
+    parser.add_argument('--restarts', type=int, default=SOLVE_RESTARTS, help="--solve 时随机重启次数")
+    parser.add_argument('--build-quadgrams', action='store_true', help="把文件当作英文语料，生成四字母组表")
+    parser.add_argument('-q', '--quadgrams', default=QUADGRAM_FILE, help="四字母组表路径，默认脚本同目录的 english_quadgrams.bin")
+    parser.add_argument('-j', '--workers', type=int, help="多文件模式的进程数，默认 CPU 核数")
+    parser.add_argument('--sketch', action='store_true', help="多文件模式下 n-gram 用 Count-Min sketch 合并，内存固定")
+    parser.add_argument('--sketch-width', type=int, default=CMS_WIDTH, help="sketch 每行的计数器数量")
+    parser.add_argument('-o', '--output', help="把各文件及合计的频率表写入文件")
+    parser.add_argument('--format', choices=['csv', 'json'], default='csv', help="-o 输出格式，默认 csv")
+    args = parser.parse_args()
+
+    if args.build_quadgrams:
+        total = build_quadgrams(args.file, args.quadgrams)
+        print(f"统计了 {total} 个四字母组，已写入 {args.quadgrams}")
+        return
+    if args.solve:
+        solve_main(args)
+        return
+
+    if os.path.isdir(args.file) or glob.has_magic(args.file):
+        paths = list(iter_paths(args.file))
+        if not paths:
+            print(f"没有匹配的文件：{args.file}")
+            sys.exit(1)
+        records, counts = aggregate_files(paths, args.order, args.text, args.encoding, args.top,
+                                          args.sketch_width if args.sketch else None, args.workers)
+        for record in records:
+            if record['error']:
+                print(f"跳过 {record['path']}：{record['error']}")
+        print(f"共统计 {len(records)} 个文件\n")
+    else:
+        try:
+            counts = count_ngrams(args.file, args.order, args.text, args.encoding)
+        except FileNotFoundError:
+            print(f"未找到文件：{args.file}")
+            sys.exit(1)
+        records = [{'path': args.file, 'counts': counts, 'error': None}]
+
+    if args.output:
+        export_tables(records, counts, args.output, args.format, args.top)
+
+    if args.all:
+        res = [(as_text(k), v) for k, v in counts[0].most_common()]
+    else:
+        res = alphabet_table(counts[0], args.text)
+    for data in res:
+        print(data)
+
+    for i in res:
+        flag = str(i[0])
+        print(flag[0], end="")
+
+    for n in range(2, args.order + 1):
+        print(f"\n\n{n}-gram 前 {args.top}:")
+        for gram, c in counts[n - 1].most_common(args.top):
+            print(f"{as_text(gram)!r}\t{c}")
+
+
+if __name__ == '__main__':
+    main()
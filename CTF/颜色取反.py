@@ -1,20 +1,470 @@
 from PIL import Image
+import io
+import os
 import sys
+import zlib
+import struct
+import argparse
+import multiprocessing
 
-def invert_image_colors(input_path, output_path):
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# 8 位样本取反查找表：v -> 255 - v，等价于按位取反
+INVERT_LUT = bytes(255 - i for i in range(256))
+IDENTITY_LUT = bytes(range(256))
+# 取反后 Sub/Up/Paeth 行的滤波值变为原来的相反数
+NEGATE_LUT = bytes(-i & 0xff for i in range(256))
+
+PNG_SIGNATURE = b'\x89PNG\r\n\x1a\n'
+# 每种 PNG 颜色类型的样本数，以及其中最后一个样本是否为 alpha
+PNG_CHANNELS = {0: (1, False), 2: (3, False), 3: (1, False), 4: (2, True), 6: (4, True)}
+PNG_FILTER_AVERAGE = 3
+# 输出 IDAT 的 zlib 压缩级别，与 Pillow 保存 PNG 的默认值相同
+PNG_COMPRESS_LEVEL = 6
+# 流式处理时输出的 IDAT 块大小与读文件的块大小
+IDAT_SIZE = 1 << 16
+READ_SIZE = 1 << 20
+# 需要还原像素时每次交给 Pillow 处理的数据量，内存只与它有关
+STRIP_SIZE = 4 << 20
+# 还原像素时按每像素字节数借用的 8 位 Pillow 模式：滤波只看字节和每像素字节数，与样本的真实含义无关
+STRIP_MODES = {1: ('L', 0), 2: ('LA', 4), 3: ('RGB', 2), 4: ('RGBA', 6)}
+
+# 隐写分析流水线可输出的视图
+PIPELINE_VIEWS = ('invert', 'planes', 'xor', 'lsb')
+IMAGE_EXTENSIONS = ('.png', '.bmp', '.jpg', '.jpeg', '.gif', '.tif', '.tiff', '.webp', '.ppm', '.pgm')
+
+
+def invert_pil(image):
+    """Pillow 图像取反：按模式用查找表一次 point() 完成，alpha 不变，调色板图只改调色板"""
+    mode = image.mode
+    if mode == 'P':
+        inverted = image.copy()
+        palette = inverted.getpalette()
+        inverted.putpalette([255 - v for v in palette])
+        return inverted
+    if mode in ('I', 'I;16'):
+        return image.point(lambda i: i * -1 + 65535)
+    if mode.startswith('I;16'):
+        return invert_pil(image.convert('I')).convert(mode)
+    if mode == 'F':
+        raise ValueError("不支持浮点图像 (mode F) 取反")
+    bands = image.getbands()
+    lut = b''.join(IDENTITY_LUT if band in ('A', 'a') else INVERT_LUT for band in bands)
+    return image.point(list(lut))
+
+
+def _read_chunk(f):
+    header = f.read(8)
+    if len(header) < 8:
+        return None, None, None
+    length, ctype = struct.unpack('>I4s', header)
+    data = f.read(length)
+    crc = f.read(4)
+    return ctype, data, crc
+
+
+def _write_chunk(f, ctype, data):
+    f.write(struct.pack('>I', len(data)) + ctype + data)
+    f.write(struct.pack('>I', zlib.crc32(ctype + data) & 0xffffffff))
+
+
+def _paeth(a, b, c):
+    p = a + b - c
+    pa, pb, pc = abs(p - a), abs(p - b), abs(p - c)
+    if pa <= pb and pa <= pc:
+        return a
+    return b if pb <= pc else c
+
+
+def _predict(ftype, row, prev, i, bpp):
+    a = row[i - bpp] if i >= bpp else 0
+    b = prev[i]
+    if ftype == 1:
+        return a
+    if ftype == 2:
+        return b
+    if ftype == 3:
+        return (a + b) >> 1
+    if ftype == 4:
+        return _paeth(a, b, prev[i - bpp] if i >= bpp else 0)
+    return 0
+
+
+def _unfilter(ftype, data, prev, bpp):
+    row = bytearray(data)
+    if ftype == 0:
+        return row
+    for i in range(len(row)):
+        row[i] = (row[i] + _predict(ftype, row, prev, i, bpp)) & 0xff
+    return row
+
+
+def _refilter(ftype, row, prev, bpp):
+    if ftype == 0:
+        return bytes(row)
+    return bytes((row[i] - _predict(ftype, row, prev, i, bpp)) & 0xff for i in range(len(row)))
+
+
+class _PngRowInverter:
+    """逐行处理 PNG 解压后的数据，输出同一滤波类型下取反图像的数据
+
+    对 None 行，取反就是按位取反。对 Sub/Up/Paeth 行，原像素和预测值同时取反，滤波值变为相反数，
+    查表即可，不需要还原像素。例外是行首/首行用到的图像外 0 值：它们取反后仍为 0，这些字节按 None 处理。
+    Paeth 在首行退化为 Sub，在其余行的行首退化为 Up，都满足上述规律。
+    Average 的预测值有向下取整，取反后不再是简单的相反数，只能先还原像素再重新滤波 (exact=True)。
+    alpha 样本的字节保持原值。
+    """
+
+    def __init__(self, rowbytes, bpp, alpha_bytes, exact):
+        self.rowbytes, self.bpp = rowbytes, bpp
+        self.exact = exact
+        # 每个像素中 alpha 字节的偏移
+        self.alpha_offsets = [bpp - 1 - k for k in range(alpha_bytes)]
+        mask = bytearray(b'\xff' * rowbytes)
+        for offset in self.alpha_offsets:
+            mask[offset::bpp] = bytes(len(range(offset, rowbytes, bpp)))
+        self.mask = int.from_bytes(mask, 'big')
+        self.prev = bytearray(rowbytes)
+        self.prev_inverted = bytearray(rowbytes)
+        self.first = True
+
+    def _keep_alpha(self, out, data):
+        for offset in self.alpha_offsets:
+            out[offset::self.bpp] = data[offset::self.bpp]
+
+    def process(self, ftype, data):
+        """返回取反后这一行的数据 (含开头的滤波类型字节)"""
+        return bytes((ftype,)) + self._process(ftype, data)
+
+    def flush(self):
+        return b''
+
+    def _process(self, ftype, data):
+        if self.exact:
+            row = _unfilter(ftype, data, self.prev, self.bpp)
+            inverted = bytearray((int.from_bytes(row, 'big') ^ self.mask).to_bytes(self.rowbytes, 'big'))
+            out = _refilter(ftype, inverted, self.prev_inverted, self.bpp)
+            self.prev, self.prev_inverted = row, inverted
+            self.first = False
+            return out
+        if ftype == PNG_FILTER_AVERAGE:
+            raise ValueError("Average 滤波行需要 exact 模式")
+        if ftype == 0:
+            out = bytearray(data.translate(INVERT_LUT))
+        else:
+            out = bytearray(data.translate(NEGATE_LUT))
+            if ftype == 1 or (ftype == 4 and self.first):
+                # 行首像素的左邻是图像外的 0
+                out[:self.bpp] = data[:self.bpp].translate(INVERT_LUT)
+            elif ftype == 2 and self.first:
+                # 首行的上一行是图像外的 0
+                out[:] = data.translate(INVERT_LUT)
+        self._keep_alpha(out, data)
+        self.first = False
+        return bytes(out)
+
+
+def _png_strip(color, width, rows, data):
+    """把若干行滤波数据包成一张最小的 8 位 PNG 交给 Pillow，返回 Image"""
+    png = io.BytesIO()
+    png.write(PNG_SIGNATURE)
+    _write_chunk(png, b'IHDR', struct.pack('>IIBBBBB', width, rows, 8, color, 0, 0, 0))
+    _write_chunk(png, b'IDAT', zlib.compress(data, 1))
+    _write_chunk(png, b'IEND', b'')
+    png.seek(0)
+    image = Image.open(png)
+    image.load()
+    return image
+
+
+def _png_filtered(image):
+    """让 Pillow 把图像编码成 PNG (它会按行自适应选择滤波)，取回解压后的滤波数据"""
+    png = io.BytesIO()
+    image.save(png, 'PNG', compress_level=0)
+    png.seek(len(PNG_SIGNATURE))
+    idat = bytearray()
+    while True:
+        ctype, data, _ = _read_chunk(png)
+        if ctype is None or ctype == b'IEND':
+            break
+        if ctype == b'IDAT':
+            idat += data
+    return zlib.decompress(idat)
+
+
+class _PngStripInverter:
+    """含 Average 行时的取反：按条带攒行，借 Pillow 的 C 实现还原像素、取反、再重新滤波
+
+    每个条带前面垫上上一行的像素 (滤波类型 None)，条带内第一行就能正确地参考上一行；首个条带垫全 0 行，
+    与 PNG 规定的“首行之上为 0”等价。滤波只依赖字节和每像素字节数，所以灰度 (含 1/2/4/16 位)、
+    RGB、灰度+alpha、RGBA 都可以当作每像素字节数相同的 8 位图交给 Pillow。重新滤波时滤波类型由 Pillow 自选。
+    """
+
+    def __init__(self, rowbytes, bpp, alpha_bytes):
+        self.rowbytes, self.bpp = rowbytes, bpp
+        self.mode, self.color = STRIP_MODES[bpp]
+        self.width = rowbytes // bpp
+        self.alpha_offsets = [bpp - 1 - k for k in range(alpha_bytes)]
+        self.strip_rows = max(1, STRIP_SIZE // (rowbytes + 1))
+        self.rows = []
+        self.prev = bytes(rowbytes)
+        self.prev_inverted = bytes(rowbytes)
+
+    def process(self, ftype, data):
+        self.rows.append(bytes((ftype,)) + data)
+        if len(self.rows) < self.strip_rows:
+            return b''
+        return self.flush()
+
+    def flush(self):
+        if not self.rows:
+            return b''
+        count = len(self.rows) + 1
+        image = _png_strip(self.color, self.width, count, b'\0' + self.prev + b''.join(self.rows))
+        raw = image.tobytes()[self.rowbytes:]
+        inverted = bytearray(raw.translate(INVERT_LUT))
+        for offset in self.alpha_offsets:
+            inverted[offset::self.bpp] = raw[offset::self.bpp]
+        image = Image.frombytes(self.mode, (self.width, count), self.prev_inverted + bytes(inverted))
+        out = _png_filtered(image)[self.rowbytes + 1:]
+        self.prev, self.prev_inverted = raw[-self.rowbytes:], bytes(inverted[-self.rowbytes:])
+        self.rows = []
+        return out
+
+
+def _png_rows(f, rowbytes, on_data):
+    """依次读取 IDAT 并解压，每凑够一行调用 on_data(滤波类型, 行数据)；返回 IDAT 之后的第一个块
+
+    IDAT 按 READ_SIZE 分段读取，每次解压最多 READ_SIZE 字节 (剩下的输入留在 unconsumed_tail 里)，
+    超大或压缩率极高的 IDAT 也不会一次性解压到内存里。
+    """
+    decomp = zlib.decompressobj()
+    pending = b''
+    stride = rowbytes + 1
+    limit = max(READ_SIZE, stride)
+
+    def feed(data):
+        nonlocal pending
+        while data:
+            pending += decomp.decompress(data, limit)
+            data = decomp.unconsumed_tail
+            cut = len(pending) - len(pending) % stride
+            for start in range(0, cut, stride):
+                on_data(pending[start], pending[start + 1:start + stride])
+            pending = pending[cut:]
+
+    while True:
+        header = f.read(8)
+        if len(header) < 8:
+            return None, None
+        length, ctype = struct.unpack('>I4s', header)
+        if ctype != b'IDAT':
+            data = f.read(length)
+            f.read(4)
+            return ctype, data
+        for start in range(0, length, READ_SIZE):
+            feed(f.read(min(READ_SIZE, length - start)))
+        f.read(4)
+
+
+def _scan_png_filters(path):
+    """只解压不处理，返回各行用到的滤波类型集合"""
+    with open(path, 'rb') as f:
+        f.read(8)
+        _, ihdr, _ = _read_chunk(f)
+        rowbytes = _png_geometry(ihdr)[0]
+        while True:
+            header = f.read(8)
+            length, ctype = struct.unpack('>I4s', header)
+            if ctype == b'IDAT':
+                f.seek(-8, os.SEEK_CUR)
+                break
+            f.seek(length + 4, os.SEEK_CUR)
+        filters = set()
+        _png_rows(f, rowbytes, lambda ftype, _: filters.add(ftype))
+    return filters
+
+
+def _png_geometry(ihdr):
+    width, height, depth, color, _, _, interlace = struct.unpack('>IIBBBBB', ihdr)
+    channels, has_alpha = PNG_CHANNELS[color]
+    bits = channels * depth
+    rowbytes = (width * bits + 7) // 8
+    bpp = max(1, bits // 8)
+    alpha_bytes = depth // 8 if has_alpha else 0
+    return rowbytes, bpp, alpha_bytes, color, interlace
+
+
+def invert_png_stream(input_path, output_path):
+    """逐行流式取反 PNG，内存只与一行的大小有关；隔行扫描的 PNG 返回 False 交给 Pillow 处理
+
+    调色板图只改 PLTE，像素数据原样复制。其余类型逐行解压、按滤波类型变换、再压缩写出。
+    """
+    with open(input_path, 'rb') as f:
+        if f.read(8) != PNG_SIGNATURE:
+            return False
+        ctype, ihdr, _ = _read_chunk(f)
+        if ctype != b'IHDR':
+            return False
+    rowbytes, bpp, alpha_bytes, color, interlace = _png_geometry(ihdr)
+    if interlace:
+        return False
+    exact = color != 3 and PNG_FILTER_AVERAGE in _scan_png_filters(input_path)
+    # Average 行要还原像素：每像素 1~4 字节时借 Pillow 按条带处理，16 位 RGB/RGBA 只能逐字节计算
+    if exact and bpp in STRIP_MODES:
+        inverter = _PngStripInverter(rowbytes, bpp, alpha_bytes)
+    else:
+        inverter = _PngRowInverter(rowbytes, bpp, alpha_bytes, exact)
+
+    with open(input_path, 'rb') as f, open(output_path, 'wb') as out:
+        f.read(8)
+        out.write(PNG_SIGNATURE)
+        while True:
+            ctype, data, _ = _read_chunk(f)
+            if ctype is None:
+                break
+            if ctype == b'PLTE':
+                data = data.translate(INVERT_LUT)
+            elif ctype == b'tRNS' and color in (0, 2):
+                # 透明色是一个灰度/RGB 样本值，跟着取反才能让同一批像素保持透明
+                depth = ihdr[8]
+                data = b''.join(struct.pack('>H', (1 << depth) - 1 - v)
+                                for v in struct.unpack(f'>{len(data) // 2}H', data))
+            if ctype != b'IDAT' or color == 3:
+                _write_chunk(out, ctype, data)
+                if ctype == b'IEND':
+                    break
+                continue
+
+            comp = zlib.compressobj(PNG_COMPRESS_LEVEL)
+            buffer = bytearray()
+
+            def on_row(ftype, row):
+                buffer.extend(comp.compress(inverter.process(ftype, row)))
+                while len(buffer) >= IDAT_SIZE:
+                    _write_chunk(out, b'IDAT', bytes(buffer[:IDAT_SIZE]))
+                    del buffer[:IDAT_SIZE]
+
+            # 把第一个 IDAT 退回去，由 _png_rows 统一读取所有连续的 IDAT
+            f.seek(-(len(data) + 12), os.SEEK_CUR)
+            ctype, data = _png_rows(f, rowbytes, on_row)
+            buffer.extend(comp.compress(inverter.flush()))
+            buffer.extend(comp.flush())
+            for start in range(0, len(buffer), IDAT_SIZE):
+                _write_chunk(out, b'IDAT', bytes(buffer[start:start + IDAT_SIZE]))
+            if ctype is None:
+                break
+            _write_chunk(out, ctype, data)
+            if ctype == b'IEND':
+                break
+    return True
+
+
+def invert_bmp_stream(input_path, output_path):
+    """未压缩 BMP 逐行取反：24/32 位直接改像素 (32 位的第 4 字节保持原值)，8 位及以下只改颜色表"""
+    with open(input_path, 'rb') as f:
+        header = f.read(54)
+        if len(header) < 54 or header[:2] != b'BM':
+            return False
+        offset, dib_size = struct.unpack('<II', header[10:18])
+        width, height, _, bitcount, compression = struct.unpack('<iiHHI', header[18:34])
+        if compression != 0 or bitcount not in (1, 4, 8, 24, 32):
+            return False
+        f.seek(0)
+        with open(output_path, 'wb') as out:
+            head = bytearray(f.read(offset))
+            if bitcount <= 8:
+                # 颜色表为 BGRX 四元组，第 4 字节保留
+                start = 14 + dib_size
+                table = head[start:offset]
+                inverted = bytearray(table.translate(INVERT_LUT))
+                inverted[3::4] = table[3::4]
+                head[start:offset] = inverted
+                out.write(head)
+                while True:
+                    chunk = f.read(READ_SIZE)
+                    if not chunk:
+                        break
+                    out.write(chunk)
+                return True
+            out.write(head)
+            bpp = bitcount // 8
+            pixel_bytes = abs(width) * bpp
+            stride = (pixel_bytes + 3) & ~3
+            for _ in range(abs(height)):
+                row = f.read(stride)
+                inverted = bytearray(row[:pixel_bytes].translate(INVERT_LUT))
+                if bpp == 4:
+                    inverted[3::4] = row[3:pixel_bytes:4]
+                out.write(inverted + row[pixel_bytes:])
+            out.write(f.read())
+    return True
+
+
+def _read_pnm_header(f):
+    """读取二进制 PGM/PPM (P5/P6) 头，返回 (头部字节, maxval)"""
+    head = bytearray()
+    fields = []
+    token = bytearray()
+    while len(fields) < 4:
+        c = f.read(1)
+        if not c:
+            return None, None
+        head += c
+        if c == b'#':
+            while c not in (b'\n', b'\r', b''):
+                c = f.read(1)
+                head += c
+            continue
+        if c.isspace():
+            if token:
+                fields.append(bytes(token))
+                token.clear()
+        else:
+            token += c
+    if fields[0] not in (b'P5', b'P6'):
+        return None, None
+    return bytes(head), int(fields[3])
+
+
+def invert_pnm_stream(input_path, output_path):
+    """P5/P6 按块流式取反：样本为 maxval - v，maxval 为 255/65535 时就是按位取反"""
+    with open(input_path, 'rb') as f:
+        if f.read(2) not in (b'P5', b'P6'):
+            return False
+        f.seek(0)
+        head, maxval = _read_pnm_header(f)
+        if head is None or maxval not in range(1, 256) and maxval != 65535:
+            return False
+        lut = INVERT_LUT if maxval in (255, 65535) else \
+            bytes(maxval - i if i <= maxval else i for i in range(256))
+        with open(output_path, 'wb') as out:
+            out.write(head)
+            while True:
+                chunk = f.read(READ_SIZE)
+                if not chunk:
+                    break
+                out.write(chunk.translate(lut))
+    return True
+
+
+STREAM_INVERTERS = [invert_png_stream, invert_bmp_stream, invert_pnm_stream]
+
+
+def invert_image_colors(input_path, output_path, stream=True):
     try:
+        # PNG/BMP/PGM/PPM 优先逐行流式处理，内存与图片大小无关
+        if stream and any(inverter(input_path, output_path) for inverter in STREAM_INVERTERS):
+            print(f"图片颜色取反完成，已保存到 {output_path}")
+            return
+
         # 打开图片
         image = Image.open(input_path)
 
-        # 检查图片模式
-        if image.mode == 'RGBA':
-            r, g, b, a = image.split()
-            r = r.point(lambda i: 255 - i)
-            g = g.point(lambda i: 255 - i)
-            b = b.point(lambda i: 255 - i)
-            inverted_image = Image.merge('RGBA', (r, g, b, a))
-        else:
-            inverted_image = image.point(lambda i: 255 - i)
+        inverted_image = invert_pil(image)
 
         # 保存处理后的图片
         inverted_image.save(output_path)
@@ -24,14 +474,151 @@ def invert_image_colors(input_path, output_path):
         print(f"处理图片时出现错误: {e}")
 
 
-if __name__ == "__main__":
-    if len(sys.argv) != 2:
-        print("使用方法: python im.py [文件.jpg/png/bmp]")
-        sys.exit(1)
+def load_array(path):
+    """解码一次得到 (通道名, HxWxC 数组)；调色板图展开为 RGB(A)，16 位灰度保留为 uint16"""
+    image = Image.open(path)
+    if image.mode == 'P':
+        image = image.convert('RGBA' if 'transparency' in image.info else 'RGB')
+    elif image.mode in ('1', 'CMYK', 'YCbCr', 'HSV', 'LAB', 'I', 'F', 'RGBa', 'La', 'RGBX'):
+        image = image.convert('RGBA' if 'A' in image.getbands() or 'a' in image.getbands() else 'RGB')
+    elif image.mode.startswith('I;16'):
+        image = image.convert('I;16')
+    array = np.asarray(image)
+    if array.ndim == 2:
+        array = array[:, :, None]
+    bands = image.getbands() if image.mode != 'I;16' else ('L',)
+    return bands, array
+
 
-    input_image_path = sys.argv[1]
+def compute_views(bands, array, views=PIPELINE_VIEWS, lsb_bits=(0,), lsb_channels=None):
+    """对已解码的数组一次算出所有视图，返回 {名称: 数组或字节串}
+
+    invert: 颜色通道取反 (alpha 不变)
+    planes: 每个通道的每个位平面，置位为白
+    xor:    两两通道异或
+    lsb:    指定通道的指定位按行优先/列优先依次取出并打包成字节
+    """
+    out = {}
+    depth = array.dtype.itemsize * 8
+    top = np.iinfo(array.dtype).max
+    colour = [i for i, band in enumerate(bands) if band != 'A']
+    if 'invert' in views:
+        inverted = array.copy()
+        inverted[..., colour] = top - array[..., colour]
+        out['invert'] = inverted
+    if 'planes' in views:
+        for c, band in enumerate(bands):
+            for bit in range(depth):
+                out[f'{band}_bit{bit}'] = ((array[..., c] >> bit) & 1).astype(np.uint8) * 255
+    if 'xor' in views:
+        for i in range(len(bands)):
+            for j in range(i + 1, len(bands)):
+                xored = array[..., i] ^ array[..., j]
+                out[f'{bands[i]}_xor_{bands[j]}'] = (xored >> (depth - 8)).astype(np.uint8) if depth > 8 else xored
+    if 'lsb' in views:
+        lsb_channels = lsb_channels or ''.join(bands[c] for c in colour)
+        index = [bands.index(band) for band in lsb_channels]
+        for bit in lsb_bits:
+            bits = ((array[..., index] >> bit) & 1).astype(np.uint8)
+            out[f'lsb_{lsb_channels}_bit{bit}_row'] = np.packbits(bits.reshape(-1)).tobytes()
+            out[f'lsb_{lsb_channels}_bit{bit}_col'] = np.packbits(bits.transpose(1, 0, 2).reshape(-1)).tobytes()
+    return out
+
+
+def save_views(views, out_dir, bands):
+    os.makedirs(out_dir, exist_ok=True)
+    written = []
+    for name, value in views.items():
+        if isinstance(value, bytes):
+            path = os.path.join(out_dir, name + '.bin')
+            with open(path, 'wb') as f:
+                f.write(value)
+        else:
+            path = os.path.join(out_dir, name + '.png')
+            if value.ndim == 3 and value.shape[2] == 1:
+                value = value[:, :, 0]
+            if value.ndim == 3:
+                Image.fromarray(value, ''.join(bands)).save(path)
+            else:
+                Image.fromarray(value).save(path)
+        written.append(path)
+    return written
+
+
+def run_pipeline(input_path, out_dir, views=PIPELINE_VIEWS, lsb_bits=(0,), lsb_channels=None):
+    """解码一次，算出并写出所有视图，返回 (输入路径, 写出的文件数, 错误信息)"""
+    try:
+        bands, array = load_array(input_path)
+        result = compute_views(bands, array, views, lsb_bits, lsb_channels)
+        return input_path, len(save_views(result, out_dir, bands)), None
+    except Exception as e:
+        return input_path, 0, str(e)
+
+
+def _pipeline_task(task):
+    return run_pipeline(*task)
+
+
+def iter_images(target):
+    if os.path.isdir(target):
+        for root, _, files in os.walk(target):
+            for name in sorted(files):
+                if name.lower().endswith(IMAGE_EXTENSIONS):
+                    yield os.path.join(root, name)
+    else:
+        yield target
+
+
+def batch_pipeline(target, out_root, views=PIPELINE_VIEWS, lsb_bits=(0,), lsb_channels=None, workers=None):
+    """目录下每张图片一个任务交给进程池，视图写到 out_root/<图片名>/ 下"""
+    tasks = []
+    for path in iter_images(target):
+        stem = os.path.splitext(os.path.relpath(path, target) if os.path.isdir(target) else os.path.basename(path))[0]
+        tasks.append((path, os.path.join(out_root, stem), views, lsb_bits, lsb_channels))
+    with multiprocessing.Pool(workers or os.cpu_count() or 1) as pool:
+        for path, count, error in pool.imap_unordered(_pipeline_task, tasks):
+            if error:
+                print(f"处理 {path} 时出现错误: {error}")
+            else:
+                print(f"{path}: 写出 {count} 个视图")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="图片颜色取反 (alpha 不变)；指定 --views 时输出多种隐写分析视图")
+    parser.add_argument('image', help="文件.jpg/png/bmp；--views 模式下也可以是目录")
+    parser.add_argument('-o', '--output', help="输出路径，默认在原文件名前加 'inverted_'；--views 模式下为输出目录")
+    parser.add_argument('--no-stream', action='store_true', help="不走逐行流式处理，整张图交给 Pillow")
+    parser.add_argument('--views', help=f"逗号分隔的视图：{','.join(PIPELINE_VIEWS)}，或 all")
+    parser.add_argument('--lsb-bits', default='0', help="lsb 视图提取的位，逗号分隔，默认 0")
+    parser.add_argument('--lsb-channels', help="lsb 视图的通道顺序，如 RGB、BGR，默认所有颜色通道")
+    parser.add_argument('-j', '--workers', type=int, help="目录模式的进程数，默认 CPU 核数")
+    args = parser.parse_args()
+
+    if args.views:
+        if np is None:
+            print("--views 需要 numpy")
+            sys.exit(1)
+        views = PIPELINE_VIEWS if args.views == 'all' else tuple(args.views.split(','))
+        unknown = set(views) - set(PIPELINE_VIEWS)
+        if unknown:
+            parser.error(f"未知视图: {', '.join(sorted(unknown))}")
+        lsb_bits = tuple(int(b) for b in args.lsb_bits.split(','))
+        out_root = args.output or 'stego_views'
+        if os.path.isdir(args.image):
+            batch_pipeline(args.image, out_root, views, lsb_bits, args.lsb_channels, args.workers)
+        else:
+            stem = os.path.splitext(os.path.basename(args.image))[0]
+            path, count, error = run_pipeline(args.image, os.path.join(out_root, stem), views, lsb_bits,
+                                              args.lsb_channels)
+            print(f"处理图片时出现错误: {error}" if error else f"写出 {count} 个视图到 {os.path.join(out_root, stem)}")
+        return
+
+    input_image_path = args.image
     # 生成输出文件名，假设输出文件名在原文件名前加 'inverted_'
-    import os
     file_dir, file_name = os.path.split(input_image_path)
-    output_image_path = os.path.join(file_dir, 'inverted_' + file_name)
-    invert_image_colors(input_image_path, output_image_path)
\ No newline at end of file
+    output_image_path = args.output or os.path.join(file_dir, 'inverted_' + file_name)
+    invert_image_colors(input_image_path, output_image_path, stream=not args.no_stream)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,4 +1,135 @@
-import sys, argparse, os
+import sys, argparse, os, mmap, struct, shutil, re
+
+# 支持的 USB 链路层类型
+LINKTYPE_USB_LINUX = 189            # usbmon，48 字节头
+LINKTYPE_USBPCAP = 249              # Windows USBPcap
+LINKTYPE_USB_LINUX_MMAPPED = 220    # usbmon mmap 接口，64 字节头
+USBMON_HEADER_LEN = {LINKTYPE_USB_LINUX: 48, LINKTYPE_USB_LINUX_MMAPPED: 64}
+# 中断传输，键盘 HID 报告都走这个
+USB_TRANSFER_INTERRUPT = 1
+PCAP_MAGIC = {b"\xd4\xc3\xb2\xa1": "<", b"\x4d\x3c\xb2\xa1": "<", b"\xa1\xb2\xc3\xd4": ">", b"\xa1\xb2\x3c\x4d": ">"}
+PCAPNG_SHB = 0x0A0D0D0A
+# 可以在本地解析的 -Y 过滤条件
+FILTER_CLAUSE = re.compile(r'^\s*(usb\.src|usb\.dst|usb\.addr|usb\.bus_id|usb\.device_address|usb\.endpoint_address\.number)'
+                           r'\s*==\s*"?([\d.]+)"?\s*$')
+
+
+def iter_packets(pcapfile):
+    """mmap 整个抓包文件，逐个产出 (链路层类型, 包数据)，同时支持 pcap 和 pcapng"""
+    with open(pcapfile, "rb") as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return
+        buf = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    try:
+        head = buf[:4]
+        if head in PCAP_MAGIC:
+            yield from _iter_pcap(buf, PCAP_MAGIC[head])
+        elif struct.unpack("<I", head)[0] == PCAPNG_SHB:
+            yield from _iter_pcapng(buf)
+        else:
+            raise ValueError("不是 pcap/pcapng 文件")
+    finally:
+        buf.close()
+
+
+def _iter_pcap(buf, endian):
+    linktype = struct.unpack_from(endian + "I", buf, 20)[0] & 0x0FFFFFFF
+    record = struct.Struct(endian + "IIII")
+    pos, end = 24, len(buf)
+    while pos + 16 <= end:
+        caplen = record.unpack_from(buf, pos)[2]
+        pos += 16
+        yield linktype, buf[pos:pos + caplen]
+        pos += caplen
+
+
+def _iter_pcapng(buf):
+    """按块遍历 pcapng；每个 Section 有自己的字节序和接口表"""
+    pos, end = 0, len(buf)
+    endian, linktypes = "<", []
+    while pos + 12 <= end:
+        if struct.unpack_from("<I", buf, pos)[0] == PCAPNG_SHB:
+            endian = "<" if struct.unpack_from("<I", buf, pos + 8)[0] == 0x1A2B3C4D else ">"
+            linktypes = []
+        block_type, block_len = struct.unpack_from(endian + "II", buf, pos)
+        if block_len < 12:
+            break
+        if block_type == 1:      # Interface Description Block
+            linktypes.append(struct.unpack_from(endian + "H", buf, pos + 8)[0])
+        elif block_type == 6:    # Enhanced Packet Block
+            interface, _, _, caplen = struct.unpack_from(endian + "IIII", buf, pos + 8)
+            yield linktypes[interface], buf[pos + 28:pos + 28 + caplen]
+        elif block_type == 3:    # Simple Packet Block，只能属于接口 0
+            caplen = min(struct.unpack_from(endian + "I", buf, pos + 8)[0], block_len - 16)
+            yield linktypes[0], buf[pos + 12:pos + 12 + caplen]
+        elif block_type == 2:    # 旧版 Packet Block
+            interface = struct.unpack_from(endian + "H", buf, pos + 8)[0]
+            caplen = struct.unpack_from(endian + "I", buf, pos + 20)[0]
+            yield linktypes[interface], buf[pos + 28:pos + 28 + caplen]
+        pos += block_len
+
+
+def parse_usb(linktype, packet):
+    """取出设备发往主机的中断传输数据，返回 (总线号, 设备号, 端点号, 数据)，其他包返回 None"""
+    if linktype == LINKTYPE_USBPCAP:
+        if len(packet) < 27:
+            return None
+        header_len, _, _, _, info, bus, device, endpoint, transfer, data_len = \
+            struct.unpack_from("<HQIHBHHBBI", packet, 0)
+        # info 的最低位为 1 表示数据从设备流向主机
+        if not info & 1 or transfer != USB_TRANSFER_INTERRUPT:
+            return None
+        return bus, device, endpoint & 0x7F, packet[header_len:header_len + data_len]
+    if linktype in USBMON_HEADER_LEN:
+        if len(packet) < 48:
+            return None
+        _, event, transfer, endpoint, device, bus, _, _, _, _, _, _, data_len = \
+            struct.unpack_from("<QcBBBHccqiiII", packet, 0)
+        if event != b"C" or not endpoint & 0x80 or transfer != USB_TRANSFER_INTERRUPT:
+            return None
+        start = USBMON_HEADER_LEN[linktype]
+        return bus, device, endpoint & 0x7F, packet[start:start + data_len]
+    return None
+
+
+def compile_filter(filterfield):
+    """把简单的 wireshark 过滤条件（用 && 连接的 usb.src/dst/addr 等相等判断）转成本地判断函数
+
+    不认识的条件返回 None，交给 tshark 处理。
+    """
+    if not filterfield:
+        return lambda bus, device, endpoint: True
+    checks = []
+    for clause in filterfield.split("&&"):
+        m = FILTER_CLAUSE.match(clause)
+        if not m:
+            return None
+        field, value = m.groups()
+        if field in ("usb.src", "usb.addr"):
+            # 设备发出的包 src 为 总线.设备.端点
+            checks.append(lambda bus, device, endpoint, v=value: f"{bus}.{device}.{endpoint}" == v)
+        elif field == "usb.dst":
+            # 中断 IN 的 dst 总是 host，只剩 usb.dst==host 这种写法没有意义
+            return None
+        elif field == "usb.bus_id":
+            checks.append(lambda bus, device, endpoint, v=int(value): bus == v)
+        elif field == "usb.device_address":
+            checks.append(lambda bus, device, endpoint, v=int(value): device == v)
+        else:
+            checks.append(lambda bus, device, endpoint, v=int(value): endpoint == v)
+    return lambda bus, device, endpoint: all(check(bus, device, endpoint) for check in checks)
+
+
+def iter_hid_reports(pcapfile, match=None):
+    """单遍扫描抓包文件，直接产出 HID 报告数据"""
+    for linktype, packet in iter_packets(pcapfile):
+        usb = parse_usb(linktype, packet)
+        if usb is None:
+            continue
+        bus, device, endpoint, data = usb
+        if data and (match is None or match(bus, device, endpoint)):
+            yield data
+
 
 class kbpaser:
 
@@ -6,6 +137,7 @@ class kbpaser:
             #tshark导出文件
         self.datafile="kbdatafile.txt"
         self.presses= []
+        self.use_tshark = False
 
 
         #Keyboard Traffic Dictionary
@@ -16,7 +148,15 @@ class kbpaser:
 
 
 
+    def native_do(self, pcapfile, match):
+        """本地解析抓包文件，不落地临时文件；与 formatkbdata 一样只保留 8 字节的键盘报告"""
+        for data in iter_hid_reports(pcapfile, match):
+            if len(data) == 8:
+                self.presses.append(":".join("%02x" % b for b in data))
+        print("[+] Found : 本地解析出 %d 条键盘数据" % len(self.presses))
+
     def tshark_do(self, pcapfile, filterfield, fieldvalue):
+        self.use_tshark = True
         if os.name == "nt":
             if filterfield is not None:
                 command = f"tshark -r {pcapfile} -Y {filterfield} -T fields -e {fieldvalue} > {self.datafile}"
@@ -64,11 +204,12 @@ class kbpaser:
         formatfile.close()
 
     def jiemi(self):
-        print("\n-----开始解密Tshark导出的键盘数据-----\n")
+        print("\n-----开始解密键盘数据-----\n")
         # 读取数据z
-        with open("formatKbdatafile.txt", "r") as f:
-            for line in f:
-                self.presses.append(line[0:-1]) #去掉末尾的\n
+        if self.use_tshark:
+            with open("formatKbdatafile.txt", "r") as f:
+                for line in f:
+                    self.presses.append(line[0:-1]) #去掉末尾的\n
         # 开始处理
         result = []
         for press in self.presses:
@@ -117,6 +258,8 @@ class kbpaser:
         print('\n[+] 键盘数据output :' + "".join(result))
 
         # 删除提取数据文件
+        if not self.use_tshark:
+            return
         rm_stat = eval(input(f"-----是否删除tshark导出的文件 \"{self.datafile}\", 1 or 0-----\n"))
         if rm_stat == 1:
             os.remove(self.datafile)
@@ -145,16 +288,28 @@ if __name__ == "__main__":
     """)
 
     argobject.add_argument('-f', "--pcapfile", required=True, help="here is your capturedata file")
-    argobject.add_argument('-e', "--fieldvalue", required=True, help="here is your output_format")
+    argobject.add_argument('-e', "--fieldvalue", default="usbhid.data",
+                           help="here is your output_format, only used by tshark (usbhid.data or usb.capdata)")
     argobject.add_argument('-Y', "--filterfield", help="here is your filter")
+    argobject.add_argument("--tshark", action="store_true", help="use tshark instead of the built-in pcap parser")
 
     arg = argobject.parse_args()
 
     kbparser = kbpaser()
 
-     # tshark导出数据，存储在usbdatafile.txt内
-    kbparser.tshark_do(pcapfile=arg.pcapfile, fieldvalue=arg.fieldvalue, filterfield=arg.filterfield)
-    kbparser.formatkbdata()
+    match = None if arg.tshark else compile_filter(arg.filterfield)
+    if match is None and not arg.tshark:
+        print("[-] 过滤条件 \"%s\" 无法本地处理，改用 tshark" % arg.filterfield)
+    if match is not None:
+        # 本地解析 USBPcap / usbmon 抓包，数据直接交给解密
+        kbparser.native_do(arg.pcapfile, match)
+    elif shutil.which("tshark") is None:
+        print("[-] 未找到 tshark")
+        sys.exit(1)
+    else:
+        # tshark导出数据，存储在usbdatafile.txt内
+        kbparser.tshark_do(pcapfile=arg.pcapfile, fieldvalue=arg.fieldvalue, filterfield=arg.filterfield)
+        kbparser.formatkbdata()
     kbparser.jiemi()
 
     